@@ -3,6 +3,8 @@ import os
 import time
 import logging
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configure logging
@@ -12,36 +14,44 @@ logger = logging.getLogger(__name__)
 # Check if we're running on a Raspberry Pi
 IS_RASPBERRY_PI = platform.system() == 'Linux' and os.path.exists('/proc/device-tree/model') and 'Raspberry Pi' in open('/proc/device-tree/model').read()
 
-# Import picamera2 modules
-if IS_RASPBERRY_PI:
-    from picamera2 import Picamera2
-    from picamera2.encoders import JpegEncoder
-    from picamera2.outputs import FileOutput
-else:
-    # For development on non-Raspberry Pi systems
-    import sys
-    import types
-    from PIL import Image
-    import numpy as np
-    
-    # Create mock modules
-    sys.modules['picamera2'] = types.ModuleType('picamera2')
-    sys.modules['picamera2'].Picamera2 = MockPicamera2
-    
-    sys.modules['picamera2.encoders'] = types.ModuleType('picamera2.encoders')
-    sys.modules['picamera2.encoders'].JpegEncoder = type('JpegEncoder', (), {})
-    
-    sys.modules['picamera2.outputs'] = types.ModuleType('picamera2.outputs')
-    sys.modules['picamera2.outputs'].FileOutput = type('FileOutput', (), {'__init__': lambda self, filename: None})
-    
-    # Import our mocks
-    from picamera2 import Picamera2
-    from picamera2.encoders import JpegEncoder
-    from picamera2.outputs import FileOutput
+# Camera class, resolved on first use by _load_picamera2() so importing this
+# module doesn't pull in picamera2 (or PIL for the mock)
+Picamera2 = None
+
+def _load_picamera2():
+    """Return the Picamera2 class, or MockPicamera2 when not on a Raspberry Pi."""
+    global Picamera2
+    if Picamera2 is None:
+        if IS_RASPBERRY_PI:
+            from picamera2 import Picamera2 as camera_class
+        else:
+            camera_class = MockPicamera2
+        Picamera2 = camera_class
+    return Picamera2
+
+# libjpeg-turbo encoder, if PyTurboJPEG is installed. Resolved on first use by
+# _load_jpeg_encoder(); False means it isn't available
+_jpeg_encoder = None
+
+def _load_jpeg_encoder():
+    """Return a TurboJPEG instance, or None when PyTurboJPEG isn't installed."""
+    global _jpeg_encoder
+    if _jpeg_encoder is None:
+        try:
+            from turbojpeg import TurboJPEG
+            _jpeg_encoder = TurboJPEG()
+        except (ImportError, OSError):
+            # OSError: the Python package is present but libturbojpeg isn't
+            _jpeg_encoder = False
+    return _jpeg_encoder or None
 
 class MockPicamera2:
     """Mock Picamera2 class for development on non-Raspberry Pi systems."""
     
+    # Blank frame and font shared by every mock capture, created on first use
+    _BASE_IMG = None
+    _FONT = None
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Using MockPicamera2 (not running on a Raspberry Pi)")
@@ -49,6 +59,10 @@ class MockPicamera2:
         self.camera_config = {"size": (1920, 1080)}
         self._is_configured = False
         self._is_started = False
+        # Frame buffer reused by every capture from this camera; the lock
+        # keeps concurrent request saves from drawing into it at once
+        self._frame = None
+        self._frame_lock = threading.Lock()
         # Initialize all required attributes
         self.camera_properties = {
             "PixelArraySize": (4056, 3040),
@@ -74,7 +88,7 @@ class MockPicamera2:
         
     def create_still_configuration(self, main=None, **kwargs):
         """Create a still configuration."""
-        return {"size": main if main else (1920, 1080)}
+        return {"size": main if main else (1920, 1080), "controls": kwargs.get("controls", {})}
         
     def configure(self, config):
         """Configure the camera."""
@@ -95,29 +109,82 @@ class MockPicamera2:
         """Close the camera."""
         self._is_started = False
         
-    def capture_file(self, filename):
-        """Capture a photo to a file."""
+    def capture_request(self):
+        """Return a completed request for the next frame."""
         if not self._is_started:
             self.start()
-            
-        # Create a dummy image
-        img = Image.new('RGB', (1920, 1080), color=(73, 109, 137))
+        return MockCompletedRequest(self)
+        
+    def _draw_frame(self):
+        """Draw a timestamped dummy image into the frame buffer and return it.
+        
+        The caller must hold self._frame_lock while using the result.
+        """
+        from PIL import Image, ImageDraw, ImageFont
+        
+        # Reset the frame buffer to the cached blank frame in place, so
+        # captures don't allocate a new image
+        if MockPicamera2._BASE_IMG is None:
+            MockPicamera2._BASE_IMG = Image.new('RGB', (1920, 1080), color=(73, 109, 137))
+            MockPicamera2._FONT = ImageFont.load_default()
+        if self._frame is None:
+            self._frame = self._BASE_IMG.copy()
+        else:
+            self._frame.paste(self._BASE_IMG)
+        img = self._frame
         
         # Add a timestamp
-        from PIL import ImageDraw, ImageFont
         d = ImageDraw.Draw(img)
         text = f"Mock Camera - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        d.text((10, 10), text, fill=(255, 255, 0))
+        d.text((10, 10), text, fill=(255, 255, 0), font=self._FONT)
+        return img
         
-        # Save the image
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        img.save(filename)
+    def capture_array(self):
+        """Capture a frame as an RGB numpy array."""
+        if not self._is_started:
+            self.start()
+            
+        import numpy as np
+        
+        with self._frame_lock:
+            return np.array(self._draw_frame())
+        
+    def capture_file(self, filename):
+        """Capture a photo to a file."""
+        if not self._is_started:
+            self.start()
+        
+        with self._frame_lock:
+            img = self._draw_frame()
+        
+            # Save the image (explicit quality, and no optimize pass, which would
+            # roughly double the encode time)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            img.save(filename, quality=75, optimize=False)
         return filename
         
     def camera_configuration(self):
         """Return camera configuration."""
         return self.camera_config
 
+class MockCompletedRequest:
+    """Mock of picamera2's CompletedRequest returned by capture_request."""
+    
+    def __init__(self, camera):
+        self.camera = camera
+        
+    def save(self, name, filename):
+        """Save the given stream of this request to a file."""
+        return self.camera.capture_file(filename)
+        
+    def make_array(self, name):
+        """Return a copy of the given stream of this request as a numpy array."""
+        return self.camera.capture_array()
+        
+    def release(self):
+        """Return the request's buffers to the camera."""
+        pass
+
 class CameraHandler:
     """Class to handle camera operations."""
 
@@ -125,6 +192,22 @@ class CameraHandler:
     MIN_FOCUS_DISTANCE = 8  # 20cm
     MAX_FOCUS_DISTANCE = float('inf')  # infinity
 
+    # Buffers allocated for the still stream. Two lets a new frame be captured
+    # while the previous request is still being saved without queueing up
+    # stale frames ahead of the one we want after a motion trigger
+    BUFFER_COUNT = 2
+
+    # Packed 24-bit pixels for the still stream; the padded 32-bit formats
+    # need a third more memory per buffer. picamera2's BGR888 arrays are in
+    # RGB byte order
+    STILL_FORMAT = "BGR888"
+
+    # JPEG settings used when encoding with libjpeg-turbo
+    JPEG_QUALITY = 85
+
+    # Longest time setup() waits for exposure to settle after starting the camera
+    SETTLE_TIMEOUT = 0.5
+
     def __init__(self, resolution=(1920, 1080), rotation=0, focus_distance_inches=24):
         """Initialize the camera with specified resolution.
         
@@ -138,6 +221,8 @@ class CameraHandler:
         self.focus_distance_inches = focus_distance_inches
         self.camera = None
         self.logger = logging.getLogger(__name__)
+        # Output directories already created, so each photo doesn't re-check them
+        self._ensured_dirs = set()
         self.setup()
         
     def _convert_inches_to_lens_position(self, inches):
@@ -165,7 +250,7 @@ class CameraHandler:
             self.cleanup()
         
         # Initialize the camera
-        self.camera = Picamera2()
+        self.camera = _load_picamera2()()
         
         # Log camera properties and controls before configuration
         self.logger.debug("Camera properties before configuration:")
@@ -180,7 +265,9 @@ class CameraHandler:
         
         # Create and set configuration with controls
         config = self.camera.create_still_configuration(
-            main={"size": self.resolution},
+            main={"size": self.resolution, "format": self.STILL_FORMAT},
+            buffer_count=self.BUFFER_COUNT,
+            display=None,  # No preview, so don't spend an ISP output on a display stream
             controls={
                 # Only set what you want to override; omit the rest for defaults
                 "AfMode": 0,  # Manual focus, if you want to control focus
@@ -189,16 +276,17 @@ class CameraHandler:
                 "ExposureTime": 5000,  # Initial exposure time in microseconds
             }
         )
-        
+
         self.logger.info(f"Configuring camera with controls: {config['controls']}")
         self.camera.configure(config)
-        
+
         # Start the camera
         self.camera.start()
 
         # Allow time for auto exposure to settle
-        time.sleep(0.5)
-        
+        self._wait_for_settle()
+
+
         self.logger.debug("Available camera controls after configuration:")
         for control in self.camera.camera_controls:
             self.logger.debug(f"  {control}: {self.camera.camera_controls[control]}")
@@ -218,6 +306,19 @@ class CameraHandler:
         for control, value in self.camera.camera_controls.items():
             self.logger.info(f"  {control}: {value}")
         
+    def _wait_for_settle(self):
+        """Wait until auto exposure reports locked, for at most SETTLE_TIMEOUT seconds."""
+        if not hasattr(self.camera, "capture_metadata"):
+            return
+
+        # Each capture_metadata call returns with the next frame, so this ends
+        # as soon as a frame says exposure has settled (or AE is off)
+        deadline = time.monotonic() + self.SETTLE_TIMEOUT
+        while time.monotonic() < deadline:
+            metadata = self.camera.capture_metadata()
+            if metadata.get("AeLocked", True):
+                return
+
     def take_photo(self, output_path):
         """Take a photo and save it to the specified path.
         
@@ -227,18 +328,48 @@ class CameraHandler:
         Returns:
             str: Path to the saved photo
         """
-        # Ensure the output directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        # Ensure the output directory exists. The cache is keyed on the directory
+        # as given, so a repeat photo doesn't pay for abspath's getcwd() call.
+        output_dir = os.path.dirname(output_path)
+        if output_dir not in self._ensured_dirs:
+            os.makedirs(os.path.abspath(output_dir), exist_ok=True)
+            self._ensured_dirs.add(output_dir)
         
         self.logger.info(f"Taking photo and saving to {output_path}")
         
-        # Capture the image directly to a file
-        self.camera.capture_file(output_path)
+        # Grab the next frame from the running pipeline and save its main stream
+        request = self.camera.capture_request()
+        self._save_request(request, output_path)
+        return output_path
+    
+    def _save_request(self, request, output_path):
+        """Save a captured request's main stream to a file and release it.
         
+        With PyTurboJPEG installed the frame is encoded by libjpeg-turbo's
+        SIMD encoder, otherwise by picamera2's own save().
+        """
+        encoder = _load_jpeg_encoder()
+        if encoder is None:
+            try:
+                request.save("main", output_path)
+            finally:
+                request.release()
+        else:
+            from turbojpeg import TJPF_RGB, TJSAMP_420
+            
+            # Copy the frame out so its buffer goes back to the camera before encoding
+            try:
+                frame = request.make_array("main")
+            finally:
+                request.release()
+            jpeg = encoder.encode(frame, quality=self.JPEG_QUALITY,
+                                  pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420)
+            with open(output_path, 'wb') as f:
+                f.write(jpeg)
         self.logger.info(f"Photo saved to {output_path}")
-        return output_path
     
-    def take_timelapse_photos(self, output_dir, interval=5, count=10, prefix="timelapse_"):
+    def take_timelapse_photos(self, output_dir, interval=5, count=10, prefix="timelapse_",
+                              stop_event=None):
         """Take a series of photos at regular intervals.
         
         Args:
@@ -246,29 +377,48 @@ class CameraHandler:
             interval (int): Interval between photos in seconds
             count (int): Number of photos to take
             prefix (str): Prefix for photo filenames
+            stop_event (threading.Event, optional): Ends the timelapse early
+                when set, including part way through a wait
             
         Returns:
             list: List of paths to saved photos
         """
         # Ensure the output directory exists
         os.makedirs(output_dir, exist_ok=True)
+        self._ensured_dirs.add(output_dir)
         
         self.logger.info(f"Starting timelapse: {count} photos at {interval}s intervals")
         
+        # Frames are grabbed on this thread and saved on a worker, so JPEG encoding
+        # and disk writes overlap the wait for the next frame. Photos are scheduled
+        # from the start time, so the cadence doesn't drift by the capture time.
         photo_paths = []
-        for i in range(count):
-            # Generate timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{prefix}{timestamp}.jpg"
-            output_path = os.path.join(output_dir, filename)
-            
-            # Take photo
-            self.take_photo(output_path)
-            photo_paths.append(output_path)
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            saves = []
+            for i in range(count):
+                # Generate timestamp
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filename = f"{prefix}{timestamp}.jpg"
+                output_path = os.path.join(output_dir, filename)
+                
+                # Take photo
+                request = self.camera.capture_request()
+                saves.append(executor.submit(self._save_request, request, output_path))
+                photo_paths.append(output_path)
+                
+                # Wait for next interval (except after the last photo)
+                if i < count - 1:
+                    delay = max(0, start_time + (i + 1) * interval - time.monotonic())
+                    if stop_event is None:
+                        time.sleep(delay)
+                    elif stop_event.wait(delay):
+                        self.logger.info("Timelapse stopped early")
+                        break
             
-            # Wait for next interval (except after the last photo)
-            if i < count - 1:
-                time.sleep(interval)
+            # Surface any failed saves
+            for save in saves:
+                save.result()
                 
         self.logger.info(f"Timelapse complete, {len(photo_paths)} photos taken")
         return photo_paths
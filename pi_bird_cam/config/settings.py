@@ -32,6 +32,7 @@ class Settings:
         "uploader": {
             "service": "s3",
             "bucket": "bird-photos",
+            "endpoint": None,  # Upload-session service handing out pre-signed URLs
             "auto_upload": True
         },
         "inference": {
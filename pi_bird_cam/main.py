@@ -1,27 +1,39 @@
 """Main module for the Raspberry Pi Bird Camera project."""
 import time
+import atexit
 import logging
+import logging.handlers
 import os
 import signal
 import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from sensors.pir_sensor import PIRSensor
 from camera.camera_handler import CameraHandler
 from storage.photo_storage import PhotoStorage
-from uploader.uploader import Uploader
-from inference.inference_engine import InferenceEngine
 from config.settings import Settings
+# Uploader and InferenceEngine are imported in main() only when enabled,
+# so their dependencies don't slow startup when they're switched off
 
 
 # Flag to indicate if shutdown is requested
 shutdown_requested = False
 
+# Photos allowed to wait for processing before capture waits for the worker
+PIPELINE_QUEUE_SIZE = 3
+
+# Uploads run in parallel; the Uploader retries failed requests itself
+UPLOAD_WORKERS = 4
+
 
 def signal_handler(sig, frame):
     """Handle signals for graceful shutdown."""
     global shutdown_requested
-    logging.info(f"Received signal {sig}, initiating shutdown...")
+    # Only set the flag: logging or waking the sensor here takes locks the
+    # interrupted main thread may already hold. The main loop notices the
+    # flag within a second and handles cleanup.
     shutdown_requested = True
-    # Don't exit immediately, let the main loop handle cleanup
 
 
 def setup_logging(debug=False):
@@ -37,14 +49,34 @@ def setup_logging(debug=False):
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
     
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("logs/bird_camera.log"),
-            logging.StreamHandler()
-        ]
-    )
+    # Formatting and file/console writes happen on a listener thread; logging
+    # calls on the capture path only put the record on a queue
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.FileHandler("logs/bird_camera.log"),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # The queue handler only merges the message and arguments (and any
+    # traceback); the listener's handlers apply the full format
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    # force replaces the handler camera_handler's import-time basicConfig installed
+    logging.basicConfig(level=log_level, handlers=[queue_handler], force=True)
+    
+    # The format doesn't use these, so skip collecting them for every record.
+    # They apply process-wide, which is fine here: main.py owns the process
+    # and its only formatters are the two above.
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
     
     # Set logging level for specific components
     for component in ['sensors.pir_sensor', 'camera.camera_handler', 
@@ -53,6 +85,77 @@ def setup_logging(debug=False):
         logging.getLogger(component).setLevel(log_level)
 
 
+def upload_photo(uploader, photo_path, remote_path):
+    """Upload a photo and log the outcome.
+    
+    Retries happen inside the Uploader, so this makes a single call.
+    
+    Args:
+        uploader (Uploader): Uploader used to send the photo
+        photo_path (str): Local path of the photo
+        remote_path (str): Path to upload the photo to
+        
+    Returns:
+        str: URL of the uploaded photo, or None if the upload failed
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        url = uploader.upload_photo(photo_path, remote_path)
+    except Exception as e:
+        logger.error(f"Error during upload of {photo_path}: {e}")
+        return None
+    if not url:
+        logger.error(f"Failed to upload {photo_path}")
+        return None
+    logger.info(f"Photo uploaded: {url}")
+    return url
+
+
+def process_photos(process_queue, storage, inference, uploader=None, upload_pool=None):
+    """Run inference and save metadata for captured photos.
+    
+    Runs on a worker thread so the main loop can go back to waiting for motion
+    while the previous photo is classified. Processed photos are submitted to
+    upload_pool when uploading is enabled. Stops when it receives None.
+    
+    Args:
+        process_queue (queue.Queue): (photo_path, filename) tuples from the main loop
+        storage (PhotoStorage): Storage used to save photo metadata
+        inference (InferenceEngine): Inference engine, or None
+        uploader (Uploader): Uploader, or None
+        upload_pool (ThreadPoolExecutor): Pool that runs the uploads, or None
+    """
+    logger = logging.getLogger(__name__)
+    while True:
+        item = process_queue.get()
+        if item is None:
+            return
+        
+        photo_path, filename = item
+        try:
+            # Store photo metadata
+            metadata = {"trigger": "motion_detection"}
+            
+            # Run inference if available
+            if inference:
+                try:
+                    detections = inference.detect(photo_path)
+                    if detections:
+                        logger.info(f"Bird detection results: {detections}")
+                        metadata["detections"] = detections
+                except Exception as e:
+                    logger.error(f"Error during inference: {e}")
+            
+            # Save metadata
+            storage.save_photo(photo_path, filename, metadata)
+            
+            # Upload in the background if available
+            if uploader and upload_pool:
+                upload_pool.submit(upload_photo, uploader, photo_path, os.path.basename(photo_path))
+        except Exception as e:
+            logger.exception(f"Error processing photo {photo_path}: {e}")
+
+
 def main():
     """Main function for the bird camera application."""
     # Check for debug mode flag
@@ -117,12 +220,17 @@ def main():
     uploader = None
     inference = None
     
-    # Only initialize uploader if auto_upload is enabled
-    if settings.get("uploader", "auto_upload"):
+    # Only initialize uploader if auto_upload is enabled and there is
+    # somewhere to upload to
+    if settings.get("uploader", "auto_upload") and not settings.get("uploader", "endpoint"):
+        logger.info("No upload endpoint configured, uploads are disabled")
+    elif settings.get("uploader", "auto_upload"):
         try:
+            from uploader.uploader import Uploader
             uploader = Uploader(
                 service_type=settings.get("uploader", "service"),
-                credentials=None  # TODO: Add credentials handling
+                credentials=None,  # TODO: Add credentials handling
+                endpoint=settings.get("uploader", "endpoint")
             )
             logger.info("Uploader initialized")
         except Exception as e:
@@ -131,6 +239,7 @@ def main():
     # Only initialize inference if auto_classify is enabled
     if settings.get("inference", "auto_classify"):
         try:
+            from inference.inference_engine import InferenceEngine
             inference = InferenceEngine(
                 model_path=settings.get("inference", "model_path"),
                 confidence_threshold=settings.get("inference", "confidence_threshold")
@@ -139,15 +248,26 @@ def main():
         except Exception as e:
             logger.warning(f"Failed to initialize inference engine: {e}")
     
+    # Capture stays on the main loop; inference/metadata run on one worker thread
+    # and uploads on a pool, so the next motion event isn't missed while they finish
+    process_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    upload_pool = None
+    if uploader:
+        upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS,
+                                         thread_name_prefix="photo-uploader")
+    process_worker = threading.Thread(
+        target=process_photos, name="photo-processor", daemon=True,
+        args=(process_queue, storage, inference, uploader, upload_pool))
+    process_worker.start()
+    
     try:
         logger.info("Entering main loop")
         
         # Main loop
         while not shutdown_requested:
             try:
-                logger.debug("Waiting for motion...")
-                
-                # Wait for motion detection
+                # Wait for motion detection (blocks for up to a second, so
+                # the loop needs no sleep of its own)
                 if pir_sensor.wait_for_motion(timeout=1.0):
                     logger.info("Motion detected! Taking photo...")
                     
@@ -161,49 +281,38 @@ def main():
                         photo_path = camera.take_photo(photo_path)
                         logger.info(f"Photo captured: {photo_path}")
                         
-                        # Store photo metadata
-                        metadata = {"trigger": "motion_detection"}
-                        
-                        # Run inference if available
-                        if inference:
-                            try:
-                                detections = inference.detect(photo_path)
-                                if detections:
-                                    logger.info(f"Bird detection results: {detections}")
-                                    metadata["detections"] = detections
-                            except Exception as e:
-                                logger.error(f"Error during inference: {e}")
-                        
-                        # Save metadata
-                        storage.save_photo(photo_path, filename, metadata)
-                        
-                        # Upload if available
-                        if uploader and settings.get("uploader", "auto_upload"):
-                            try:
-                                remote_path = os.path.basename(photo_path)
-                                url = uploader.upload_photo(photo_path, remote_path)
-                                logger.info(f"Photo uploaded: {url}")
-                            except Exception as e:
-                                logger.error(f"Error during upload: {e}")
+                        # Hand off to the workers for inference, metadata and upload
+                        process_queue.put((photo_path, filename))
                         
                     except Exception as e:
                         logger.exception(f"Error processing motion event: {e}")
                 
-                # Small sleep to prevent CPU hogging
-                time.sleep(0.1)
-                
             except Exception as e:
                 logger.exception(f"Error in main loop iteration: {e}")
                 if not shutdown_requested:
                     time.sleep(1)  # Prevent tight loop on errors
+        
+        logger.info("Shutdown requested, leaving main loop")
             
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
     except Exception as e:
         logger.exception(f"Error in main loop: {e}")
     finally:
+        # Let the workers finish the photos already queued
+        logger.info("Waiting for queued photos to be processed")
+        process_queue.put(None)
+        process_worker.join()
+        if upload_pool:
+            upload_pool.shutdown(wait=True)
+        
         # Clean up resources
         logger.info("Cleaning up resources")
+        try:
+            storage.close()
+        except Exception as e:
+            logger.error(f"Error saving photo metadata: {e}")
+        
         try:
             pir_sensor.cleanup()
         except Exception as e:
@@ -214,6 +323,12 @@ def main():
         except Exception as e:
             logger.error(f"Error cleaning up camera: {e}")
         
+        if uploader:
+            try:
+                uploader.cleanup()
+            except Exception as e:
+                logger.error(f"Error cleaning up uploader: {e}")
+        
         logger.info("Application shutdown complete")
 
 
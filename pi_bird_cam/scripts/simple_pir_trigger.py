@@ -19,10 +19,11 @@ import datetime
 import pigpio
 import signal
 import sys
+import queue
+import threading
 import logging
 import logging.handlers
 from pi_bird_cam.camera.camera_handler import CameraHandler
-import RPi.GPIO as GPIO
 
 # Configure logging
 def setup_logging():
@@ -73,7 +74,9 @@ DEFAULT_PIR_PIN = 4
 # Example: (5 × 0.3) + 0.2 = 1.7 seconds
 DEFAULT_BURST_COUNT = 5  # number of photos in burst
 DEFAULT_BURST_DELAY = 0.3  # seconds between burst photos
-DEFAULT_SAMPLING_RATE = 0.1  # seconds between PIR sensor checks
+DEFAULT_SAMPLING_RATE = 0.1  # unused, kept so existing launch scripts still parse
+DEFAULT_GLITCH_FILTER_US = 20000  # ignore PIR pulses shorter than 20ms
+DEFAULT_CAPTURE_QUEUE_SIZE = 4  # bursts waiting for the camera before new motion is dropped
 DEFAULT_COOLDOWN = (DEFAULT_BURST_COUNT * DEFAULT_BURST_DELAY) + 0.2  # seconds between motion triggers
 # Default time range (5am to 9am PST)
 DEFAULT_TIME_RANGE_ENABLED = True
@@ -85,6 +88,14 @@ DEFAULT_END_MINUTE = 0
 # Global camera variable
 camera = None
 
+# Background capture worker, so the PIR loop never waits on the camera
+capture_queue = None
+capture_thread = None
+photo_count = 0
+
+# Set by the signal handler; the main loop notices it within a second
+shutdown_requested = False
+
 def initialize_camera():
     """Initialize the camera and keep it active"""
     global camera
@@ -114,22 +125,14 @@ def initialize_camera():
         return False
 
 def capture_photo(output_dir, filename):
-    """Capture a high-resolution photo with the always-active camera"""
+    """Capture a high-resolution photo with the always-active camera
+
+    output_dir must already exist; capture_burst creates it once per burst.
+    """
     global camera
     
-    # Ensure the base output directory exists
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # Create date-based directory
-    date_dir = datetime.datetime.now().strftime("%Y%m%d")
-    date_dir_path = os.path.join(output_dir, date_dir)
-    
-    # Ensure date directory exists
-    os.makedirs(date_dir_path, exist_ok=True)
-    
     # Full path for the photo
-    output_path = os.path.join(date_dir_path, filename)
+    output_path = os.path.join(output_dir, filename)
     
     try:
         # Make sure camera is initialized
@@ -158,14 +161,11 @@ def capture_burst(output_dir, base_filename, count, delay):
     """Capture a burst of photos in sequence"""
     successful_captures = 0
     
-    # Use timestamp as the base for all files in burst
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Create date-based directory name
-    date_dir = datetime.datetime.now().strftime("%Y%m%d")
-    date_dir_path = os.path.join(output_dir, date_dir)
-    
-    # Ensure date directory exists
+    # Use one timestamp as the base for all files in burst, and create the
+    # date-based directory once here rather than for every photo
+    now = time.localtime()
+    timestamp = time.strftime("%Y%m%d_%H%M%S", now)
+    date_dir_path = os.path.join(output_dir, time.strftime("%Y%m%d", now))
     os.makedirs(date_dir_path, exist_ok=True)
     
     for i in range(count):
@@ -173,7 +173,7 @@ def capture_burst(output_dir, base_filename, count, delay):
         filename = f"{timestamp}_burst{i+1}.jpg"
             
         # Capture the photo
-        if capture_photo(output_dir, filename):
+        if capture_photo(date_dir_path, filename):
             successful_captures += 1
         
         # Wait between burst photos, but not after the last one
@@ -182,24 +182,63 @@ def capture_burst(output_dir, base_filename, count, delay):
     
     return successful_captures
 
+def capture_worker():
+    """Run queued bursts one at a time on the background capture thread"""
+    global photo_count
+    while True:
+        job = capture_queue.get()
+        try:
+            if job is None:
+                return
+            output_dir, prefix, count, delay = job
+            successful = capture_burst(output_dir, prefix, count, delay)
+            photo_count += successful
+            if successful > 0:
+                logging.info(f"Burst complete: {successful}/{count} photos captured")
+            else:
+                logging.error("Failed to capture any photos in burst")
+        except Exception as e:
+            logging.error(f"Error in capture worker: {e}")
+        finally:
+            capture_queue.task_done()
+
+def start_capture_worker():
+    """Start the background capture thread"""
+    global capture_queue, capture_thread
+    capture_queue = queue.Queue(maxsize=DEFAULT_CAPTURE_QUEUE_SIZE)
+    capture_thread = threading.Thread(target=capture_worker, name="capture-worker", daemon=True)
+    capture_thread.start()
+
+def stop_capture_worker():
+    """Let queued bursts finish, then stop the background capture thread"""
+    global capture_thread
+    if capture_thread is None:
+        return
+    capture_queue.put(None)
+    capture_thread.join()
+    capture_thread = None
+
 def cleanup():
     """Clean up resources properly"""
     global camera
     try:
+        stop_capture_worker()
         if camera:
             camera.cleanup()
             camera = None
             time.sleep(0.5)  # Give time for resources to be fully released
-        GPIO.cleanup()
     except Exception as e:
         logging.error(f"Error during cleanup: {e}")
     logging.info("Cleanup complete")
 
 def signal_handler(sig, frame):
-    """Handle Ctrl+C and other signals"""
-    logging.info("Exiting...")
-    cleanup()
-    sys.exit(0)
+    """Handle Ctrl+C and other signals
+
+    Only sets a flag: stopping the capture worker blocks, so it is left to
+    the main loop's cleanup rather than done inside the handler.
+    """
+    global shutdown_requested
+    shutdown_requested = True
 
 def is_time_in_range(start_hour, start_minute, end_hour, end_minute):
     """Check if current time is within the specified range.
@@ -241,7 +280,11 @@ def main():
     parser.add_argument("--burst-delay", "-bd", type=float, default=DEFAULT_BURST_DELAY,
                         help=f"Delay between burst photos in seconds (default: {DEFAULT_BURST_DELAY}s)")
     parser.add_argument("--sampling-rate", "-sr", type=float, default=DEFAULT_SAMPLING_RATE,
-                        help=f"How often to check PIR sensor in seconds (default: {DEFAULT_SAMPLING_RATE}s)")
+                        help="Ignored: motion is detected with pigpio edge callbacks "
+                             "instead of polling")
+    parser.add_argument("--glitch-filter", "-gf", type=int, default=DEFAULT_GLITCH_FILTER_US,
+                        help="Ignore PIR pulses shorter than this many microseconds "
+                             f"(default: {DEFAULT_GLITCH_FILTER_US})")
     parser.add_argument("--test", action="store_true",
                         help="Take a test burst and exit (no PIR trigger)")
     
@@ -291,13 +334,13 @@ def main():
         logging.error("  sudo pigpiod")
         return
     
-    # Set up the PIR pin
+    # Set up the PIR pin and filter out short spikes in hardware, so a single
+    # noisy pulse does not cost a full-resolution burst
     pi.set_mode(args.pin, pigpio.INPUT)
+    pi.set_glitch_filter(args.pin, args.glitch_filter)
     
     # Initialize variables
     last_motion_time = 0
-    last_state = pi.read(args.pin)
-    photo_count = 0
     last_time_check = 0
     is_active_time = False if args.time_range else True
     
@@ -307,7 +350,8 @@ def main():
     logging.info(f"Maximum resolution photos (4056x3040)")
     logging.info(f"Burst mode: {args.burst} photos with {args.burst_delay}s delay")
     logging.info(f"Cooldown between triggers: {args.cooldown}s")
-    logging.info(f"PIR sensor sampling rate: {args.sampling_rate}s")
+    logging.info(f"PIR glitch filter: {args.glitch_filter}us")
+    logging.info("PIR sensor edges delivered by pigpio callbacks")
     
     if args.time_range:
         logging.info(f"Time-based activation enabled: {start_hour:02d}:{start_minute:02d} to {end_hour:02d}:{end_minute:02d}")
@@ -324,11 +368,30 @@ def main():
     time.sleep(5)
     logging.info("Ready to detect motion!")
     
+    # pigpio samples the pin via DMA and calls back on every edge, so the
+    # main thread can sleep on an event instead of polling the pin
+    motion_event = threading.Event()
+    
+    def on_edge(gpio, level, tick):
+        if level == 2:  # watchdog timeout, not an edge
+            return
+        state_name = "HIGH (1)" if level == 1 else "LOW (0)"
+        logging.debug(f"PIR state changed to {state_name}")
+        if level == 1:
+            motion_event.set()
+    
+    edge_callback = pi.callback(args.pin, pigpio.EITHER_EDGE, on_edge)
+    
     try:
         # Initialize camera and keep it active
         initialize_camera()
+        start_capture_worker()
         
-        while True:
+        while not shutdown_requested:
+            # Wake on a rising edge, or after a second to re-check the time range
+            # and notice a shutdown request
+            motion_detected = motion_event.wait(timeout=1.0)
+            motion_event.clear()
             current_time = time.time()
             
             # Check if we need to update the active time status (check every minute)
@@ -345,39 +408,21 @@ def main():
                         logging.info("Exiting active time range - PIR sensor is now inactive")
             
             # Only process motion detection if in active time range or if time range is disabled
-            if is_active_time:
-                # Read current state
-                current_state = pi.read(args.pin)
-                
-                # Print state changes for debugging
-                if current_state != last_state:
-                    state_name = "HIGH (1)" if current_state == 1 else "LOW (0)"
-                    logging.debug(f"PIR state changed to {state_name}")
-                
-                # Check if motion was detected (rising edge: 0->1) and past cooldown period
-                if current_state == 1 and last_state == 0 and (current_time - last_motion_time > args.cooldown):
-                    # Motion detected, take a burst of photos
-                    logging.info(f"Motion detected! Capturing burst of {args.burst} photos...")
-                    
-                    # Capture the burst
-                    successful = capture_burst(args.output, "motion", args.burst, args.burst_delay)
-                    photo_count += successful
-                    
-                    if successful > 0:
-                        logging.info(f"Burst complete: {successful}/{args.burst} photos captured")
-                        last_motion_time = current_time
-                    else:
-                        logging.error("Failed to capture any photos in burst")
-                    
-                # Update last state
-                last_state = current_state
-            
-            # Delay between PIR sensor checks (sampling rate)
-            time.sleep(args.sampling_rate)
+            cooled_down = current_time - last_motion_time > args.cooldown
+            if motion_detected and is_active_time and cooled_down:
+                # Motion detected, hand a burst to the capture worker and keep listening
+                logging.info(f"Motion detected! Queueing burst of {args.burst} photos...")
+                try:
+                    capture_queue.put_nowait((args.output, "motion", args.burst, args.burst_delay))
+                    last_motion_time = current_time
+                except queue.Full:
+                    logging.warning("Capture queue full, dropping motion event")
             
+        logging.info("Exiting...")
     except KeyboardInterrupt:
         logging.info("\nProgram stopped by user")
     finally:
+        edge_callback.cancel()
         if pi.connected:
             pi.stop()
         cleanup()
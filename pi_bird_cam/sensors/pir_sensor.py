@@ -1,6 +1,7 @@
 """PIR Motion Sensor Module for detecting movement."""
 import time
 import logging
+import threading
 try:
     import RPi.GPIO as GPIO
 except ImportError:
@@ -13,6 +14,7 @@ except ImportError:
         BCM = "BCM"
         IN = "IN"
         PUD_DOWN = "PUD_DOWN"
+        RISING = "RISING"
         
         def __init__(self):
             self.pins = {}
@@ -30,8 +32,26 @@ except ImportError:
             import random
             detected = random.random() < 0.2
             return detected
+        
+        def add_event_detect(self, pin, edge, callback=None):
+            # Simulate rising edges from a background thread at the same
+            # rate the old 0.1s polling loop would have seen motion
+            stop = threading.Event()
+            
+            def fire():
+                while not stop.wait(0.1):
+                    if self.input(pin):
+                        callback(pin)
+            
+            self.pins[pin] = stop
+            threading.Thread(target=fire, daemon=True).start()
+        
+        def remove_event_detect(self, pin):
+            stop = self.pins.get(pin)
+            if isinstance(stop, threading.Event):
+                stop.set()
             
-        def cleanup(self):
+        def cleanup(self, pin=None):
             self.pins = {}
     
     # Create mock GPIO module
@@ -54,6 +74,7 @@ class PIRSensor:
         self.cooldown_time = cooldown_time
         self.logger = logging.getLogger(__name__)
         self.last_detection_time = 0
+        self._motion_event = threading.Event()
         self.setup()
         
     def setup(self):
@@ -61,6 +82,13 @@ class PIRSensor:
         self.logger.info(f"Setting up PIR sensor on GPIO pin {self.pin}")
         GPIO.setmode(GPIO.BCM)
         GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+        # Rising edges are delivered by the GPIO interrupt thread, so waiting
+        # for motion blocks on an Event instead of polling the pin
+        GPIO.add_event_detect(self.pin, GPIO.RISING, callback=self._on_edge)
+        
+    def _on_edge(self, channel):
+        """Record a rising edge on the PIR pin."""
+        self._motion_event.set()
         
     def detect_motion(self):
         """Detect motion from the PIR sensor.
@@ -91,15 +119,31 @@ class PIRSensor:
         Returns:
             bool: True if motion was detected, False if timeout occurred
         """
-        self.logger.info(f"Waiting for motion (timeout: {timeout if timeout else 'none'})")
+        # Debug level: the main loop calls this every second while idle
+        self.logger.debug(f"Waiting for motion (timeout: {timeout if timeout else 'none'})")
+        
+        # The sensor holds its output high while motion continues, which
+        # produces no new edge, so check the current level first
+        if self.detect_motion():
+            return True
         
-        start_time = time.time()
-        while timeout is None or time.time() - start_time < timeout:
-            if self.detect_motion():
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            if not self._motion_event.wait(remaining):
+                break
+            self._motion_event.clear()
+            
+            current_time = time.time()
+            # Edges inside the cooldown window are ignored, as in detect_motion
+            if current_time - self.last_detection_time >= self.cooldown_time:
+                self.logger.info("Motion detected by PIR sensor")
+                self.last_detection_time = current_time
                 return True
-            time.sleep(0.1)  # Small sleep to prevent CPU hogging
             
-        self.logger.info("Timeout occurred while waiting for motion")
+        self.logger.debug("Timeout occurred while waiting for motion")
         return False
         
     def cleanup(self):
@@ -107,4 +151,5 @@ class PIRSensor:
         self.logger.info("Cleaning up PIR sensor GPIO resources")
         # Only clean up the specific pin we used
         # This is safer than GPIO.cleanup() which cleans up all pins
+        GPIO.remove_event_detect(self.pin)
         GPIO.cleanup(self.pin) 
\ No newline at end of file
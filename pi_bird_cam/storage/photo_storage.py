@@ -1,14 +1,100 @@
 """Photo storage module for managing captured images."""
 import os
+import time
 import shutil
 import logging
+from collections import deque
 from datetime import datetime
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+
+def _json_dumps(obj):
+    """Encode an object as compact JSON bytes, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _json_loads(data):
+    """Decode JSON bytes, using orjson when it's installed.
+    
+    Both decoders raise a json.JSONDecodeError subclass on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _fast_copy(src, dst):
+    """Copy a file like shutil.copy2, keeping the data inside the kernel.
+    
+    os.copy_file_range copies without a userspace buffer and can share blocks
+    on filesystems with reflinks. Where it is unavailable or fails (older
+    kernels, copies across filesystems), shutil.copyfile is used instead,
+    which uses os.sendfile on Linux.
+    
+    Args:
+        src (str): Path of the file to copy
+        dst (str): Path to copy it to
+    """
+    copied = False
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+                remaining = os.fstat(in_fd).st_size
+                while remaining > 0:
+                    sent = os.copy_file_range(in_fd, out_fd, remaining)
+                    if sent == 0:
+                        break
+                    remaining -= sent
+            copied = remaining <= 0
+        except OSError:
+            pass
+    
+    if not copied:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def _write_bytes(path, data):
+    """Write data to a new file at path and drop it from the page cache.
+    
+    Photos aren't read back soon after saving, so POSIX_FADV_DONTNEED starts
+    writeback and lets the kernel evict their pages instead of the metadata
+    and code that are used again. Skipped where posix_fadvise isn't available.
+    
+    Args:
+        path (str): File to create or overwrite
+        data (bytes): Contents to write
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, len(data), os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
 
 class PhotoStorage:
     """Class to handle photo storage operations."""
 
+    # The journal is folded into the metadata file once it holds this many
+    # times more entries than there are photos (or COMPACT_MIN_ENTRIES)
+    COMPACT_RATIO = 10
+    COMPACT_MIN_ENTRIES = 100
+
     def __init__(self, base_dir="photos", max_photos=1000, metadata_file="photo_metadata.json"):
         """Initialize photo storage with base directory.
         
@@ -20,8 +106,17 @@ class PhotoStorage:
         self.base_dir = base_dir
         self.max_photos = max_photos
         self.metadata_file = os.path.join(base_dir, metadata_file)
+        # Changes since the metadata file was last written, one JSON object per line
+        self.journal_file = os.path.splitext(self.metadata_file)[0] + '.jsonl'
         self.logger = logging.getLogger(__name__)
         self.metadata = {}
+        # Filenames in self.metadata, oldest first, so the oldest photos can be
+        # found without listing the directories
+        self._order = deque()
+        self._journal = None
+        self._journal_entries = 0
+        # Date directories already created, so each photo doesn't re-check them
+        self._ensured_dirs = set()
         self.setup()
         
     def setup(self):
@@ -30,27 +125,162 @@ class PhotoStorage:
         os.makedirs(self.base_dir, exist_ok=True)
         
         # Load existing metadata if it exists
-        if os.path.exists(self.metadata_file):
+        if os.path.exists(self.metadata_file) or os.path.exists(self.journal_file):
             self.load_metadata()
         
+        # Unbuffered, so each entry reaches the file in a single write
+        self._journal = open(self.journal_file, 'ab', buffering=0)
+        
+        self._track_untracked_photos()
+        
+    def _track_untracked_photos(self):
+        """Add photos on disk that have no metadata, so they count toward max_photos.
+        
+        Covers photos saved before a crash or copied in by hand. Their file
+        modification time stands in for the capture timestamp.
+        """
+        untracked = [
+            (name, entry) for name, entry in self._scan_photos()
+            if os.path.basename(name) not in self.metadata
+        ]
+        if not untracked:
+            return
+        
+        self.logger.info(f"Found {len(untracked)} photos without metadata")
+        for name, entry in untracked:
+            filename = os.path.basename(name)
+            self.metadata[filename] = {
+                'timestamp': datetime.fromtimestamp(entry.stat().st_mtime).isoformat(),
+                'filename': filename,
+                'path': os.path.join(self.base_dir, name),
+            }
+            self._record('add', filename, self.metadata[filename])
+        self._order = deque(sorted(self.metadata,
+                                   key=lambda f: self.metadata[f].get('timestamp', '')))
+        
     def load_metadata(self):
-        """Load metadata from the metadata file."""
+        """Load metadata from the metadata file and replay the journal on top."""
         try:
-            with open(self.metadata_file, 'r') as f:
-                self.metadata = json.load(f)
-            self.logger.info(f"Loaded metadata for {len(self.metadata)} photos")
-        except (json.JSONDecodeError, FileNotFoundError) as e:
+            with open(self.metadata_file, 'rb') as f:
+                self.metadata = _json_loads(f.read())
+        except FileNotFoundError:
+            self.metadata = {}
+        except json.JSONDecodeError as e:
             self.logger.warning(f"Failed to load metadata: {str(e)}")
             self.metadata = {}
+        
+        self._journal_entries = self._replay_journal()
+        self._order = deque(sorted(self.metadata,
+                                   key=lambda f: self.metadata[f].get('timestamp', '')))
+        self.logger.info(f"Loaded metadata for {len(self.metadata)} photos")
+    
+    def _replay_journal(self):
+        """Apply the journal entries to self.metadata.
+        
+        A last line without a newline was cut short by a crash mid-append.
+        It is dropped and the file truncated back to the previous line, so
+        the next append starts on a line of its own.
+        
+        Returns:
+            int: Number of entries in the journal
+        """
+        entries = 0
+        complete_end = 0
+        torn = False
+        try:
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        self.logger.warning(f"Dropping incomplete metadata journal entry: {line!r}")
+                        torn = True
+                        break
+                    complete_end += len(line)
+                    try:
+                        entry = _json_loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash or power loss
+                        self.logger.warning(f"Skipping corrupt metadata journal entry: {line!r}")
+                        continue
+                    if entry['op'] == 'add':
+                        self.metadata[entry['k']] = entry['v']
+                    elif entry['op'] == 'del':
+                        self.metadata.pop(entry['k'], None)
+                    entries += 1
+            if torn:
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(complete_end)
+        except FileNotFoundError:
+            pass
+        return entries
             
     def save_metadata(self):
-        """Save metadata to the metadata file."""
+        """Save metadata to the metadata file.
+        
+        Returns:
+            bool: True if the metadata was written, False otherwise
+        """
+        tmp_file = self.metadata_file + '.tmp'
         try:
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
+            # Write a compact copy next to the file and rename it into place,
+            # so a crash mid-write never leaves a truncated metadata file. The
+            # copy is synced first so the rename can't land before its data.
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps(self.metadata))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.metadata_file)
             self.logger.info(f"Saved metadata for {len(self.metadata)} photos")
+            return True
         except Exception as e:
             self.logger.error(f"Failed to save metadata: {str(e)}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            return False
+    
+    def _record(self, op, key, value=None):
+        """Append a metadata change to the journal.
+        
+        Args:
+            op (str): 'add' to set the metadata for key, 'del' to remove it
+            key (str): Photo filename
+            value (dict, optional): Metadata for an 'add'
+        """
+        entry = {'op': op, 'k': key}
+        if op == 'add':
+            entry['v'] = value
+        try:
+            self._journal.write(_json_dumps(entry) + b'\n')
+            self._journal_entries += 1
+        except Exception as e:
+            self.logger.error(f"Failed to write metadata journal: {str(e)}")
+            return
+        
+        threshold = self.COMPACT_RATIO * max(len(self.metadata), self.COMPACT_MIN_ENTRIES)
+        if self._journal_entries > threshold:
+            self.compact()
+    
+    def compact(self):
+        """Fold the journal into the metadata file and empty it."""
+        # Replaying the journal over the new file gives the same result, so a
+        # crash between these two steps loses nothing
+        if self.save_metadata() and self._journal is not None:
+            self._journal.truncate(0)
+            self._journal_entries = 0
+    
+    def flush_metadata(self):
+        """Write out metadata changes still only held in the journal."""
+        if self._journal_entries:
+            self.compact()
+    
+    def close(self):
+        """Flush metadata and close the journal."""
+        if self._journal is None:
+            return
+        self.flush_metadata()
+        self._journal.close()
+        self._journal = None
     
     def get_date_directory(self, date=None):
         """Get the date directory name in YYYYMMDD format.
@@ -73,8 +303,11 @@ class PhotoStorage:
             
         Returns:
             str: Unique filename based on timestamp
+
+        Names have one-second resolution, so they sort in capture order as
+        long as photos are taken less than once per second.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         return f"{timestamp}{extension}"
         
     def save_photo(self, photo_data, filename=None, metadata=None):
@@ -100,21 +333,21 @@ class PhotoStorage:
         
         if isinstance(photo_data, bytes):
             # If photo_data is bytes, write directly
+            _write_bytes(full_path, photo_data)
+        elif isinstance(photo_data, (str, os.PathLike)) and os.path.exists(photo_data):
+            # If photo_data is a file path, copy the file. The camera normally
+            # writes straight to the storage path, in which case there is
+            # nothing to copy
+            if not (os.path.exists(full_path) and os.path.samefile(photo_data, full_path)):
+                _fast_copy(photo_data, full_path)
+        elif hasattr(photo_data, 'read'):
+            # File-like object: stream it across in chunks
             with open(full_path, 'wb') as f:
-                f.write(photo_data)
+                shutil.copyfileobj(photo_data, f)
         else:
-            # If photo_data is a file path, copy the file
-            try:
-                if os.path.exists(photo_data):
-                    shutil.copy2(photo_data, full_path)
-                else:
-                    # Assume it's a file-like object
-                    with open(full_path, 'wb') as f:
-                        f.write(photo_data.read())
-            except (AttributeError, TypeError):
-                # Last resort: try to write it as string
-                with open(full_path, 'w') as f:
-                    f.write(str(photo_data))
+            # Last resort: try to write it as string
+            with open(full_path, 'w') as f:
+                f.write(str(photo_data))
         
         # Store metadata
         if metadata is None:
@@ -124,8 +357,10 @@ class PhotoStorage:
         metadata['filename'] = filename
         metadata['path'] = full_path
         
+        self._discard_from_order(filename)
         self.metadata[filename] = metadata
-        self.save_metadata()
+        self._order.append(filename)
+        self._record('add', filename, metadata)
         
         # Enforce max photos limit
         self._enforce_max_photos()
@@ -134,19 +369,24 @@ class PhotoStorage:
     
     def _enforce_max_photos(self):
         """Enforce the maximum number of photos by deleting the oldest ones."""
-        photo_files = self.list_photos()
+        num_to_delete = len(self._order) - self.max_photos
+        if num_to_delete <= 0:
+            return
         
-        if len(photo_files) > self.max_photos:
-            # Sort by creation time (oldest first)
-            photo_files.sort(key=lambda f: os.path.getctime(self.get_photo_path(f)))
-            
-            # Calculate how many to delete
-            num_to_delete = len(photo_files) - self.max_photos
-            self.logger.info(f"Enforcing max photos limit, deleting {num_to_delete} oldest photos")
-            
-            # Delete oldest photos
-            for i in range(num_to_delete):
-                self.delete_photo(photo_files[i])
+        self.logger.info(f"Enforcing max photos limit, deleting {num_to_delete} oldest photos")
+        # Bounded, so a photo that can't be removed from the order can't spin forever
+        for _ in range(num_to_delete):
+            filename = self._order[0]
+            # Photos live in date directories, so delete by their stored path
+            path = self.metadata.get(filename, {}).get('path') or self.get_photo_path(filename)
+            if not self._remove_photo(filename, path):
+                if os.path.exists(path):
+                    # Couldn't delete it (permissions, busy); keep it tracked
+                    # and try again after the next save
+                    self.logger.error(f"Stopping eviction, {path} could not be deleted")
+                    break
+                # Already gone from disk; forget it so the loop moves on
+                self._forget_photo(filename)
         
     def list_photos(self):
         """List all saved photos.
@@ -154,42 +394,42 @@ class PhotoStorage:
         Returns:
             list: List of photo filenames
         """
-        if not os.path.exists(self.base_dir):
-            return []
-        
-        photo_files = []
+        return [name for name, _ in self._scan_photos()]
+    
+    def _scan_photos(self):
+        """Find photos in the base directory and its date directories.
         
-        # Get all directories in the base directory
-        all_dirs = [d for d in os.listdir(self.base_dir) 
-                   if os.path.isdir(os.path.join(self.base_dir, d))]
+        Returns:
+            list: (name, os.DirEntry) pairs, where name is dir_name/filename
+                  for photos in a date directory and filename otherwise
+        """
+        try:
+            with os.scandir(self.base_dir) as entries:
+                base_entries = list(entries)
+        except FileNotFoundError:
+            return []
         
-        # Also include the base directory itself for backward compatibility
-        all_dirs.append("")
+        photos = []
+        for entry in base_entries:
+            if entry.is_dir():
+                try:
+                    with os.scandir(entry.path) as dir_entries:
+                        photos.extend(
+                            (os.path.join(entry.name, photo.name), photo)
+                            for photo in dir_entries if self._is_photo(photo)
+                        )
+                except OSError as e:
+                    self.logger.error(f"Error listing files in {entry.path}: {str(e)}")
+            # Photos directly in the base directory, for backward compatibility
+            elif self._is_photo(entry):
+                photos.append((entry.name, entry))
         
-        for dir_name in all_dirs:
-            dir_path = os.path.join(self.base_dir, dir_name)
-            
-            # Skip if not a directory
-            if not os.path.isdir(dir_path):
-                continue
-                
-            # Get all files in the directory
-            try:
-                dir_files = os.listdir(dir_path)
-                
-                # Filter for image files
-                for f in dir_files:
-                    if (f.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')) and
-                        os.path.isfile(os.path.join(dir_path, f))):
-                        # Store as dir_name/filename if in a subdirectory
-                        if dir_name:
-                            photo_files.append(os.path.join(dir_name, f))
-                        else:
-                            photo_files.append(f)
-            except Exception as e:
-                self.logger.error(f"Error listing files in {dir_path}: {str(e)}")
-                      
-        return photo_files
+        return photos
+    
+    @staticmethod
+    def _is_photo(entry):
+        """Check whether a directory entry is an image file."""
+        return entry.name.lower().endswith(PHOTO_EXTENSIONS) and entry.is_file()
         
     def get_photo_path(self, filename):
         """Get full path for a photo.
@@ -210,7 +450,9 @@ class PhotoStorage:
         date_dir_path = os.path.join(self.base_dir, date_dir)
         
         # Create the date directory if it doesn't exist
-        os.makedirs(date_dir_path, exist_ok=True)
+        if date_dir_path not in self._ensured_dirs:
+            os.makedirs(date_dir_path, exist_ok=True)
+            self._ensured_dirs.add(date_dir_path)
         
         # Return the path with the date directory included
         return os.path.join(date_dir_path, filename)
@@ -238,20 +480,40 @@ class PhotoStorage:
             bool: True if deletion was successful, False otherwise
         """
         path = self.get_photo_path(filename)
+        return self._remove_photo(os.path.basename(filename), path)
+    
+    def _remove_photo(self, filename, path):
+        """Delete the photo file at path and forget its metadata.
         
+        Args:
+            filename (str): Metadata key of the photo
+            path (str): Full path to the photo
+            
+        Returns:
+            bool: True if deletion was successful, False otherwise
+        """
         if os.path.exists(path):
             try:
                 os.remove(path)
-                
-                # Remove from metadata
-                base_filename = os.path.basename(filename)
-                if base_filename in self.metadata:
-                    del self.metadata[base_filename]
-                    self.save_metadata()
-                
-                self.logger.info(f"Deleted photo: {filename}")
+                self._forget_photo(filename)
+                self.logger.info(f"Deleted photo: {path}")
                 return True
             except Exception as e:
-                self.logger.error(f"Failed to delete photo {filename}: {str(e)}")
+                self.logger.error(f"Failed to delete photo {path}: {str(e)}")
                 
-        return False 
\ No newline at end of file
+        return False
+    
+    def _forget_photo(self, filename):
+        """Remove a photo from the metadata and the age order."""
+        # The order is cleaned up even without metadata, so a stale entry
+        # can't stay at the front of it
+        self._discard_from_order(filename)
+        if self.metadata.pop(filename, None) is not None:
+            self._record('del', filename)
+    
+    def _discard_from_order(self, filename):
+        """Remove a filename from the age order if it's there."""
+        try:
+            self._order.remove(filename)
+        except ValueError:
+            pass  # Metadata was set without going through save_photo
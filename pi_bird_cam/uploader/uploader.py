@@ -1,40 +1,216 @@
 """Photo uploader module for uploading captured images to cloud storage."""
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 
 class Uploader:
     """Class to handle photo upload operations."""
 
-    def __init__(self, service_type="s3", credentials=None):
+    # Number of parallel PUT connections used by upload_batch
+    DEFAULT_MAX_WORKERS = 6
+    # Retry settings for session requests and individual PUT requests
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+    REQUEST_TIMEOUT = 30  # seconds
+
+    def __init__(self, service_type="s3", credentials=None, endpoint=None,
+                 max_workers=DEFAULT_MAX_WORKERS):
         """Initialize uploader with service type and credentials.
-        
+
         Args:
             service_type (str): Type of storage service (s3, dropbox, etc.)
             credentials (dict): Credentials for the storage service
+            endpoint (str, optional): Base URL of the upload-session service that
+                                      hands out pre-signed upload URLs
+            max_workers (int): Maximum number of parallel uploads in a batch
         """
         self.service_type = service_type
         self.credentials = credentials
+        self.endpoint = endpoint
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
         self.setup()
-        
+
     def setup(self):
-        """Setup uploader with appropriate credentials."""
-        pass
-        
+        """Setup uploader with appropriate credentials.
+
+        Creates one HTTP session that is reused for every upload so TCP/TLS
+        connections are kept alive between photos. The connection pool is
+        sized to the number of parallel uploads.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def upload_photo(self, file_path, remote_path=None):
         """Upload a photo to the cloud storage.
-        
+
         Args:
             file_path (str): Path to the file to upload
             remote_path (str, optional): Custom path in the cloud storage
-            
+
         Returns:
             str: URL or identifier for the uploaded file
         """
-        pass
-        
+        remote_paths = [remote_path] if remote_path else None
+        urls = self.upload_batch([file_path], remote_paths)
+        return urls[0] if urls else None
+
+    def upload_batch(self, file_paths, remote_paths=None):
+        """Upload several photos in a single upload session.
+
+        The session service is asked for one pre-signed PUT URL per file, the
+        files are then sent straight to storage over a bounded pool of parallel
+        connections, and finally the session is committed with the list of
+        files that were uploaded successfully.
+
+        Args:
+            file_paths (list): Paths of the files to upload
+            remote_paths (list, optional): Custom paths in the cloud storage,
+                                           one per file. Defaults to the basenames
+
+        Returns:
+            list: URLs of the uploaded files, in the order of file_paths.
+                  Files that failed to upload are omitted.
+        """
+        if not file_paths:
+            return []
+        if not self.endpoint:
+            raise ValueError("No upload endpoint configured")
+
+        if remote_paths is None:
+            remote_paths = [os.path.basename(p) for p in file_paths]
+        if len(remote_paths) != len(file_paths):
+            raise ValueError("remote_paths must have one entry per file")
+        # Each remote path maps to one pre-signed URL, so duplicates would
+        # overwrite each other (e.g. same-named photos from different days)
+        if len(set(remote_paths)) != len(remote_paths):
+            raise ValueError("remote_paths must be unique")
+
+        upload_session = self._start_session(remote_paths)
+        session_id = upload_session["session_id"]
+        presigned_urls = upload_session["urls"]
+
+        # Files the service returned no URL for are treated as failed uploads
+        missing = [remote for remote in remote_paths if remote not in presigned_urls]
+        if missing:
+            self.logger.error(f"Session {session_id} returned no upload URL for "
+                              f"{len(missing)} photos, e.g. {missing[0]}")
+
+        self.logger.info(f"Uploading {len(file_paths)} photos in session {session_id}")
+
+        def put(item):
+            file_path, remote = item
+            if remote not in presigned_urls:
+                return False
+            return self._put_file(presigned_urls[remote], file_path)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(put, zip(file_paths, remote_paths)))
+
+        uploaded = [remote for remote, ok in zip(remote_paths, results) if ok]
+        self._commit_session(session_id, uploaded)
+
+        failed = len(file_paths) - len(uploaded)
+        if failed:
+            self.logger.error(f"{failed} of {len(file_paths)} photos failed to upload")
+
+        # Strip the signature query string to get the plain object URL
+        return [presigned_urls[remote].split("?", 1)[0] for remote in uploaded]
+
+    def _start_session(self, remote_paths):
+        """Open an upload session and request pre-signed URLs.
+
+        Args:
+            remote_paths (list): Remote paths to request upload URLs for
+
+        Returns:
+            dict: Session description with "session_id" and a "urls" mapping
+                  of remote path to pre-signed PUT URL
+        """
+        return self._post("start_session", {"files": remote_paths}).json()
+
+    def _commit_session(self, session_id, uploaded):
+        """Mark an upload session as complete.
+
+        Args:
+            session_id (str): Identifier returned by _start_session
+            uploaded (list): Remote paths that were uploaded successfully
+        """
+        self._post("commit_session", {"session_id": session_id, "files": uploaded})
+
+    def _post(self, action, payload):
+        """POST a JSON payload to the session service, retrying with backoff.
+
+        Args:
+            action (str): Endpoint path, e.g. "start_session"
+            payload (dict): JSON body of the request
+
+        Returns:
+            requests.Response: The successful response
+
+        Raises:
+            Exception: The last error if every attempt failed
+        """
+        delay = self.RETRY_BACKOFF
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                response = self.session.post(
+                    f"{self.endpoint}/{action}",
+                    json=payload,
+                    timeout=self.REQUEST_TIMEOUT
+                )
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                self.logger.warning(f"{action} request failed "
+                                    f"(attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                if attempt == self.MAX_RETRIES - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def _put_file(self, url, file_path):
+        """PUT a single file to a pre-signed URL, retrying with backoff.
+
+        Args:
+            url (str): Pre-signed PUT URL
+            file_path (str): Path to the file to upload
+
+        Returns:
+            bool: True if the upload succeeded, False otherwise
+        """
+        delay = self.RETRY_BACKOFF
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                with open(file_path, 'rb') as f:
+                    response = self.session.put(url, data=f, timeout=self.REQUEST_TIMEOUT)
+                response.raise_for_status()
+                return True
+            except Exception as e:
+                self.logger.warning(f"Upload of {file_path} failed "
+                                    f"(attempt {attempt + 1}/{self.MAX_RETRIES}): {e}")
+                if attempt < self.MAX_RETRIES - 1:
+                    time.sleep(delay)
+                    delay *= 2
+        return False
+
     def list_uploaded_photos(self):
         """List all uploaded photos.
-        
+
         Returns:
             list: List of uploaded photo identifiers
         """
-        pass 
\ No newline at end of file
+        pass
+
+    def cleanup(self):
+        """Close the HTTP session and its pooled connections."""
+        if getattr(self, "session", None):
+            self.session.close()
+            self.session = None
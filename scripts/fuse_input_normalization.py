@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Move the [0, 1] input normalization of the ONNX bird model into the graph.
+
+Prepends Cast(float32) and Mul(1/255) to the model input and changes the
+input type to uint8, so callers can pass raw RGB pixels instead of building a
+float32 copy of every image.
+
+Usage:
+  python3 scripts/fuse_input_normalization.py [--input MODEL] [--output MODEL]
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+DEFAULT_INPUT = "common/models/bird_model.onnx"
+DEFAULT_OUTPUT = "common/models/bird_model.uint8.onnx"
+
+
+def fuse_input_normalization(model):
+    """Rewrite the model in place to take uint8 pixels on its first input."""
+    graph = model.graph
+    model_input = graph.input[0]
+    input_name = model_input.name
+    float_name = f"{input_name}_float"
+    scale_name = f"{input_name}_scale"
+    normalized_name = f"{input_name}_normalized"
+
+    # Point every consumer of the original input at the normalized tensor
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == input_name:
+                node.input[i] = normalized_name
+
+    graph.initializer.append(
+        numpy_helper.from_array(np.array(1.0 / 255.0, dtype=np.float32), name=scale_name)
+    )
+    graph.node.insert(0, helper.make_node("Mul", [float_name, scale_name], [normalized_name]))
+    graph.node.insert(0, helper.make_node("Cast", [input_name], [float_name], to=TensorProto.FLOAT))
+
+    model_input.type.tensor_type.elem_type = TensorProto.UINT8
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fuse input normalization into the ONNX bird model')
+    parser.add_argument('--input', default=DEFAULT_INPUT,
+                        help=f'Model with float32 input (default: {DEFAULT_INPUT})')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f'Model with uint8 input (default: {DEFAULT_OUTPUT})')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Model not found: {args.input}")
+        sys.exit(1)
+
+    model = onnx.load(args.input)
+    if model.graph.input[0].type.tensor_type.elem_type == TensorProto.UINT8:
+        print(f"{args.input} already takes uint8 input")
+        sys.exit(0)
+
+    fuse_input_normalization(model)
+    onnx.checker.check_model(model)
+    onnx.save(model, args.output)
+    print(f"Saved model with uint8 input to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
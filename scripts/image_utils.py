@@ -0,0 +1,56 @@
+# Shared image loading for the bird model test scripts
+
+import os
+import cv2
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# JPEG DCT-domain downscale factors supported by cv2.imread, largest first
+REDUCED_READ_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def list_images(image_dir):
+    """Return the sorted paths of the image files directly inside image_dir"""
+    with os.scandir(image_dir) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()
+        )
+
+
+def read_resized(image_path, width, height):
+    """
+    Read an image as BGR and resize it to width x height
+
+    Large images are decoded at 1/2, 1/4 or 1/8 scale when that still leaves
+    at least the target resolution, so most of the full-size decode is skipped.
+
+    Args:
+        image_path: Path to the image file
+        width: Target width in pixels
+        height: Target height in pixels
+
+    Returns:
+        numpy.ndarray of shape (height, width, 3), dtype uint8
+    """
+    flags = cv2.IMREAD_COLOR
+    try:
+        # Only the header is read here, not the pixel data
+        with Image.open(image_path) as header:
+            src_width, src_height = header.size
+        for factor, reduced_flag in REDUCED_READ_FLAGS:
+            if src_width // factor >= width and src_height // factor >= height:
+                flags = reduced_flag
+                break
+    except OSError:
+        pass  # Let cv2.imread report unreadable files below
+
+    img = cv2.imread(image_path, flags)
+    if img is None:
+        raise FileNotFoundError(f"Could not read image at {image_path}")
+    return cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
@@ -0,0 +1,96 @@
+# Shared ONNX Runtime session setup for the bird model test scripts
+
+import os
+import json
+import functools
+import onnxruntime as ort
+
+# Execution providers in order of preference; unavailable ones are skipped
+PREFERRED_PROVIDERS = [
+    "CUDAExecutionProvider",
+    "CPUExecutionProvider",
+]
+
+
+def create_session(model_path):
+    """
+    Create an inference session with full graph optimization enabled
+
+    The first run saves the graph, optimized up to the extended level, next
+    to the model, and later runs start from that file. Layout optimizations
+    (ORT_ENABLE_ALL) are tuned to the CPU they run on, so they are only
+    applied in memory and never written to the cache.
+
+    Args:
+        model_path: Path to the ONNX model
+
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    available = ort.get_available_providers()
+    providers = [p for p in PREFERRED_PROVIDERS if p in available]
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = os.cpu_count() or 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+
+    # Optimized graphs depend on the provider and on the ONNX Runtime version
+    # that fused them, so cache one per primary provider and version
+    device = providers[0].replace("ExecutionProvider", "").lower()
+    optimized_path = (f"{os.path.splitext(model_path)[0]}"
+                      f".{device}.ort{ort.__version__}.opt.onnx")
+
+    if not (os.path.exists(optimized_path)
+            and os.path.getmtime(optimized_path) >= os.path.getmtime(model_path)):
+        cache_options = ort.SessionOptions()
+        cache_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        cache_options.optimized_model_filepath = optimized_path
+        ort.InferenceSession(model_path, cache_options, providers=providers)
+
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(optimized_path, options, providers=providers)
+
+
+@functools.lru_cache(maxsize=None)
+def get_session(model_path):
+    """Return a session for model_path, creating it only on the first call"""
+    return create_session(model_path)
+
+
+def eval_report_path(model_path):
+    """Path of the accuracy report quantize_onnx_model.py writes next to a model"""
+    return f"{os.path.splitext(model_path)[0]}.eval.json"
+
+
+def passed_eval(model_path):
+    """
+    Check whether a quantized model passed its accuracy check against FP32
+
+    The report must be newer than the model, so a model quantized again
+    without being re-checked is not trusted.
+    """
+    report_path = eval_report_path(model_path)
+    if not (os.path.exists(model_path) and os.path.exists(report_path)):
+        return False
+    if os.path.getmtime(report_path) < os.path.getmtime(model_path):
+        return False
+    with open(report_path) as f:
+        return bool(json.load(f).get("accepted"))
+
+
+def select_model_path(model_path, uint8_model_path, quantized_model_path):
+    """
+    Pick the model the test scripts run
+
+    The INT8 model is only used once quantize_onnx_model.py has checked it
+    against the FP32 model; otherwise the uint8-input build is used when
+    present, then the FP32 export.
+    """
+    if passed_eval(quantized_model_path):
+        return quantized_model_path
+    if os.path.exists(quantized_model_path):
+        print(f"Not using {quantized_model_path}: it has no passing accuracy check "
+              f"(see {eval_report_path(quantized_model_path)})")
+    if os.path.exists(uint8_model_path):
+        return uint8_model_path
+    return model_path
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Quantize the ONNX bird classifier to INT8 for Pi/Jetson CPU inference.
+
+By default the model is statically quantized to QDQ format with per-channel
+INT8 weights, using images from calibration_images/ to calibrate activation
+ranges. The calibration images must be held out from test_images/, which the
+quantized model is then checked on: its top-1 predictions are compared with
+the FP32 model's and the result is written to a .eval.json report next to
+the output. The test scripts only use the INT8 model when that report says
+it passed. Dynamic (weight-only) quantization needs no calibration data and
+is available as a faster fallback with --mode dynamic. Either way the result
+is roughly 4x smaller than the FP32 export. Pass
+--input common/models/bird_model.uint8.onnx to quantize the uint8-input model
+from fuse_input_normalization.py.
+
+Usage:
+  python3 scripts/quantize_onnx_model.py [--mode static|dynamic]
+      [--calibration-dir DIR] [--eval-dir DIR]
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import onnxruntime as ort
+import cv2
+
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from image_utils import list_images, read_resized
+from onnx_session import eval_report_path
+
+DEFAULT_INPUT = "common/models/bird_model.onnx"
+DEFAULT_OUTPUT = "common/models/bird_model.int8.onnx"
+DEFAULT_CALIBRATION_DIR = "calibration_images"
+DEFAULT_EVAL_DIR = "test_images"
+# Share of evaluation images whose top-1 class must match the FP32 model
+MIN_TOP1_AGREEMENT = 0.95
+
+
+def load_input(image_path, width, height, as_uint8):
+    """Read an image as a (1, height, width, 3) RGB model input."""
+    img = read_resized(image_path, width, height)
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    if not as_uint8:
+        img = img.astype(np.float32) / 255.0
+    return img[np.newaxis]
+
+
+class BirdCalibrationReader(CalibrationDataReader):
+    """Feeds preprocessed calibration images to the quantizer one at a time."""
+
+    def __init__(self, model_path, image_dir):
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Models built by fuse_input_normalization.py take raw uint8 pixels
+        self.input_is_uint8 = model_input.type == "tensor(uint8)"
+        # Model input is NHWC: (batch, height, width, channels)
+        self.height, self.width = model_input.shape[1], model_input.shape[2]
+
+        self.image_paths = list_images(image_dir)
+        if not self.image_paths:
+            raise FileNotFoundError(f"No calibration images found in {image_dir}")
+        self._paths = iter(self.image_paths)
+
+    def get_next(self):
+        for path in self._paths:
+            try:
+                img = load_input(path, self.width, self.height, self.input_is_uint8)
+            except FileNotFoundError:
+                print(f"Skipping unreadable calibration image: {path}")
+                continue
+            return {self.input_name: img}
+        return None
+
+
+def check_held_out(calibration_dir, eval_dir):
+    """Raise ValueError if the calibration images overlap the evaluation images."""
+    if os.path.realpath(calibration_dir) == os.path.realpath(eval_dir):
+        raise ValueError(f"Calibration images must be held out from {eval_dir}")
+    shared = ({os.path.basename(p) for p in list_images(calibration_dir)}
+              & {os.path.basename(p) for p in list_images(eval_dir)})
+    if shared:
+        raise ValueError(f"{len(shared)} calibration images are also in {eval_dir}, "
+                         f"e.g. {sorted(shared)[0]}")
+
+
+def quantize(input_path, output_path, mode="static", calibration_dir=DEFAULT_CALIBRATION_DIR):
+    """Quantize the model to INT8 with static (calibrated) or dynamic quantization."""
+    if mode == "dynamic":
+        quantize_dynamic(input_path, output_path, weight_type=QuantType.QUInt8)
+        return
+
+    reader = BirdCalibrationReader(input_path, calibration_dir)
+    print(f"Calibrating with {len(reader.image_paths)} images from {calibration_dir}")
+    quantize_static(
+        input_path,
+        output_path,
+        calibration_data_reader=reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QInt8,
+        weight_type=QuantType.QInt8,
+    )
+
+
+def top1_predictions(model_path, image_paths):
+    """Return the top-1 class index the model predicts for each image."""
+    session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    as_uint8 = model_input.type == "tensor(uint8)"
+    height, width = model_input.shape[1], model_input.shape[2]
+    predictions = []
+    for path in image_paths:
+        img = load_input(path, width, height, as_uint8)
+        predictions.append(int(np.argmax(session.run(None, {model_input.name: img})[0])))
+    return predictions
+
+
+def evaluate(reference_path, quantized_path, eval_dir, min_agreement=MIN_TOP1_AGREEMENT):
+    """
+    Compare the quantized model's top-1 predictions with the reference model's
+
+    Returns:
+        dict: Report with the per-image mismatches, the agreement rate and
+              whether it reached min_agreement
+    """
+    image_paths = list_images(eval_dir)
+    if not image_paths:
+        raise FileNotFoundError(f"No evaluation images found in {eval_dir}")
+
+    reference = top1_predictions(reference_path, image_paths)
+    quantized = top1_predictions(quantized_path, image_paths)
+    mismatches = [
+        {"image": os.path.basename(path), "reference": ref, "quantized": quant}
+        for path, ref, quant in zip(image_paths, reference, quantized)
+        if ref != quant
+    ]
+    agreement = 1 - len(mismatches) / len(image_paths)
+    return {
+        "reference": reference_path,
+        "eval_dir": eval_dir,
+        "images": len(image_paths),
+        "top1_agreement": agreement,
+        "min_agreement": min_agreement,
+        "mismatches": mismatches,
+        "accepted": agreement >= min_agreement,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantize the ONNX bird model to INT8')
+    parser.add_argument('--input', default=DEFAULT_INPUT,
+                        help=f'ONNX model to quantize (default: {DEFAULT_INPUT})')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f'Quantized output model (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--mode', choices=['static', 'dynamic'], default='static',
+                        help='static: calibrated QDQ INT8 (default); '
+                             'dynamic: weight-only, no calibration')
+    parser.add_argument('--calibration-dir', default=DEFAULT_CALIBRATION_DIR,
+                        help='Held-out images used for static calibration '
+                             f'(default: {DEFAULT_CALIBRATION_DIR})')
+    parser.add_argument('--eval-dir', default=DEFAULT_EVAL_DIR,
+                        help='Images the INT8 model is checked against FP32 on '
+                             f'(default: {DEFAULT_EVAL_DIR})')
+    parser.add_argument('--min-agreement', type=float, default=MIN_TOP1_AGREEMENT,
+                        help='Top-1 agreement with FP32 needed to use the INT8 model '
+                             f'(default: {MIN_TOP1_AGREEMENT})')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Model not found: {args.input}")
+        sys.exit(1)
+
+    if args.mode == "static":
+        if not os.path.isdir(args.calibration_dir):
+            print(f"Calibration directory not found: {args.calibration_dir}")
+            print(f"Add bird images that are not in {args.eval_dir} to it, or use --mode dynamic")
+            sys.exit(1)
+        try:
+            check_held_out(args.calibration_dir, args.eval_dir)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+
+    print(f"Quantizing ({args.mode}) {args.input} -> {args.output}...")
+    quantize(args.input, args.output, args.mode, args.calibration_dir)
+
+    input_size = os.path.getsize(args.input) / (1024 * 1024)
+    output_size = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Done: {input_size:.1f} MB -> {output_size:.1f} MB")
+
+    print(f"Checking {args.output} against {args.input} on {args.eval_dir}...")
+    report = evaluate(args.input, args.output, args.eval_dir, args.min_agreement)
+    with open(eval_report_path(args.output), "w") as f:
+        json.dump(report, f, indent=2)
+
+    for mismatch in report["mismatches"]:
+        print(f"  {mismatch['image']}: class {mismatch['reference']} -> {mismatch['quantized']}")
+    agreement = report["top1_agreement"]
+    print(f"Top-1 agreement with FP32: {agreement:.1%} "
+          f"({agreement - 1:+.1%} vs FP32, "
+          f"{len(report['mismatches'])} of {report['images']} images changed)")
+    if report["accepted"]:
+        print("INT8 model accepted; the test scripts will use it")
+    else:
+        print(f"INT8 model below {args.min_agreement:.0%} agreement; "
+              "the test scripts will keep using FP32")
+
+
+if __name__ == "__main__":
+    main()
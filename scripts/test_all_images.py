@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test the ONNX bird classifier on every image in the test_images directory.
+
+Images are preprocessed into a preallocated batch and classified with one
+session.run call per batch, then the top 5 predictions for each image and
+the average inference time are printed. A thread pool preprocesses the next
+batch into a second buffer while the current one is being classified.
+
+Usage:
+  python3 scripts/test_all_images.py
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bird_classes import get_bird_name
+from image_utils import list_images, read_resized
+from onnx_session import get_session, select_model_path
+
+# Path to the ONNX model (prefer the INT8 build from quantize_onnx_model.py once it
+# has passed its accuracy check, then the uint8-input build from
+# fuse_input_normalization.py, when present)
+MODEL_PATH = "common/models/bird_model.onnx"
+UINT8_MODEL_PATH = "common/models/bird_model.uint8.onnx"
+QUANTIZED_MODEL_PATH = "common/models/bird_model.int8.onnx"
+TEST_IMAGE_DIR = "test_images"
+BATCH_SIZE = 16
+TOP_K = 5
+PREPROCESS_WORKERS = 4
+
+
+def preprocess_into(image_path, out):
+    """Read an image and write it, resized and in RGB order, into out (H, W, 3).
+
+    A float32 out is normalized to [0, 1]; a uint8 out receives the raw pixels
+    for models that normalize their input themselves.
+    """
+    height, width = out.shape[:2]
+    img = read_resized(image_path, width, height)
+    if out.dtype == np.uint8:
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=out)
+        return
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+    # Normalize pixel values to [0, 1] directly into the batch slot
+    np.multiply(img, np.float32(1.0 / 255.0), out=out)
+
+
+def submit_chunk(executor, paths, buffer):
+    """Start preprocessing paths into the rows of buffer, one task per image."""
+    return [(path, executor.submit(preprocess_into, path, row)) for path, row in zip(paths, buffer)]
+
+
+def collect_chunk(pending, buffer):
+    """Wait for a submitted chunk and return its readable paths and their batch."""
+    chunk, rows = [], []
+    for row, (path, future) in enumerate(pending):
+        try:
+            future.result()
+            chunk.append(path)
+            rows.append(row)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+
+    if len(rows) == len(pending):
+        return chunk, buffer[:len(rows)]
+    # Some images failed; gather the good rows into a contiguous batch
+    return chunk, buffer[rows]
+
+
+def main():
+    model_path = select_model_path(MODEL_PATH, UINT8_MODEL_PATH, QUANTIZED_MODEL_PATH)
+    print(f"Loading ONNX model: {model_path}")
+    session = get_session(model_path)
+
+    input_name = session.get_inputs()[0].name
+    input_shape = session.get_inputs()[0].shape
+    output_name = session.get_outputs()[0].name
+    input_dtype = np.uint8 if session.get_inputs()[0].type == "tensor(uint8)" else np.float32
+    # Model input is NHWC: (batch, height, width, channels)
+    height, width, channels = input_shape[1], input_shape[2], input_shape[3]
+    # Look up every class name once instead of per printed prediction
+    class_names = tuple(get_bird_name(i) for i in range(session.get_outputs()[0].shape[1]))
+
+    image_paths = list_images(TEST_IMAGE_DIR)
+    if not image_paths:
+        raise FileNotFoundError(f"No test images found in {TEST_IMAGE_DIR} directory")
+    print(f"Found {len(image_paths)} test images")
+
+    # Two batch buffers: one is classified while the next chunk is preprocessed into the other
+    batch_shape = (min(BATCH_SIZE, len(image_paths)), height, width, channels)
+    buffers = [np.empty(batch_shape, input_dtype), np.empty(batch_shape, input_dtype)]
+    chunks = [image_paths[start:start + BATCH_SIZE]
+              for start in range(0, len(image_paths), BATCH_SIZE)]
+    total_inference_time = 0.0
+    classified = 0
+
+    # Bind each batch to the session in place instead of passing it through run()
+    io_binding = session.io_binding()
+
+    with ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS) as executor:
+        pending = submit_chunk(executor, chunks[0], buffers[0])
+
+        for index in range(len(chunks)):
+            chunk, batch = collect_chunk(pending, buffers[index % 2])
+
+            # Prefetch the next chunk while this one runs through the model
+            if index + 1 < len(chunks):
+                pending = submit_chunk(executor, chunks[index + 1], buffers[(index + 1) % 2])
+            if not chunk:
+                continue
+
+            inference_start = time.time()
+            io_binding.bind_cpu_input(input_name, batch)
+            io_binding.bind_output(output_name)
+            session.run_with_iobinding(io_binding)
+            predictions = io_binding.copy_outputs_to_cpu()[0]
+            total_inference_time += time.time() - inference_start
+            classified += len(chunk)
+
+            # Top-K class indices for every image in the batch, best first: partition
+            # out the K best in O(C), then sort only those K
+            k = min(TOP_K, predictions.shape[1])
+            top_k = np.argpartition(-predictions, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(predictions, top_k, axis=1)
+            top_k = np.take_along_axis(top_k, np.argsort(-top_scores, axis=1), axis=1)
+
+            for path, scores, indices in zip(chunk, predictions, top_k):
+                print(f"\n{os.path.basename(path)}")
+                for rank, class_id in enumerate(indices, 1):
+                    print(f"  {rank}. {class_names[class_id]}: {scores[class_id]:.4f}")
+
+    print("\n-------- Summary --------")
+    print(f"Images classified: {classified}/{len(image_paths)}")
+    if classified:
+        average_ms = total_inference_time * 1000 / classified
+        print(f"Average inference time: {average_ms:.2f} ms per image")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,15 @@
 """
 Test script to verify imports on Jetson Nano.
 Run this to identify which specific package or module is causing the illegal instruction error.
+
+Usage:
+  python3 test_jetson_imports.py [--skip-tf]
+  --skip-tf skips the TensorFlow import, which can take several seconds on the Nano.
 """
 
 import os
 import sys
+import argparse
 import logging
 import platform
 from importlib import import_module
@@ -135,6 +140,11 @@ def check_model_file():
     return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Test Python package imports on the Jetson Nano')
+    parser.add_argument('--skip-tf', action='store_true',
+                        help='Skip the slow TensorFlow import test')
+    args = parser.parse_args()
+    
     try:
         log.info("===== Testing Jetson Nano Python Package Imports =====")
         system_info()
@@ -148,8 +158,11 @@ if __name__ == "__main__":
         log.info("\n----- Testing Numeric and ML Libraries -----")
         test_numerics()
         
-        log.info("\n----- Testing TensorFlow -----")
-        test_tensorflow()
+        if args.skip_tf:
+            log.info("\n----- Skipping TensorFlow (--skip-tf) -----")
+        else:
+            log.info("\n----- Testing TensorFlow -----")
+            test_tensorflow()
         
         log.info("\n----- Checking Model Files -----")
         check_model_file()
@@ -11,10 +11,14 @@ Usage:
 import argparse
 import json
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import socket
 import sys
 
+# /health body is fixed apart from the timestamp, so only that is formatted per request
+HEALTH_PREFIX = b'{"status": "ok", "message": "Jetson Nano test server is running", "timestamp": '
+HEALTH_SUFFIX = b'}'
+
 def get_ip_address():
     """Get the primary IP address of this machine"""
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -34,16 +38,19 @@ class TestHandler(BaseHTTPRequestHandler):
         self.send_header('Content-type', content_type)
         self.end_headers()
     
+    def do_HEAD(self):
+        """Handle HEAD requests (used by the connectivity check)"""
+        if self.path in ("/health", "/"):
+            self._set_headers("application/json" if self.path == "/health" else "text/html")
+        else:
+            self.send_response(404)
+            self.end_headers()
+    
     def do_GET(self):
         """Handle GET requests"""
         if self.path == "/health":
             self._set_headers()
-            response = {
-                "status": "ok",
-                "timestamp": time.time(),
-                "message": "Jetson Nano test server is running"
-            }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(HEALTH_PREFIX + repr(time.time()).encode() + HEALTH_SUFFIX)
         elif self.path == "/":
             self._set_headers("text/html")
             self.wfile.write(b"<html><body><h1>Jetson Nano Test Server</h1><p>Server is running.</p></body></html>")
@@ -83,7 +90,8 @@ class TestHandler(BaseHTTPRequestHandler):
 def run_server(port=8000):
     """Run the HTTP server"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, TestHandler)
+    # One thread per connection so concurrent connectivity tests do not queue
+    httpd = ThreadingHTTPServer(server_address, TestHandler)
     ip = get_ip_address()
     
     print(f"Starting test server on {ip}:{port}")
@@ -1,61 +1,64 @@
 import numpy as np
-import onnxruntime as ort
 import cv2
 import time
 import os
-import glob
+import sys
 
-# Path to the ONNX model
-model_path = "common/models/bird_model.onnx"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from image_utils import list_images, read_resized
+from onnx_session import get_session, select_model_path
+
+# Path to the ONNX model (prefer the INT8 build from quantize_onnx_model.py once it
+# has passed its accuracy check, then the uint8-input build from
+# fuse_input_normalization.py, when present)
+model_path = select_model_path(
+    "common/models/bird_model.onnx",
+    "common/models/bird_model.uint8.onnx",
+    "common/models/bird_model.int8.onnx",
+)
 
 # Load the ONNX model
-print("Loading ONNX model...")
-session = ort.InferenceSession(model_path)
+print(f"Loading ONNX model: {model_path}")
+session = get_session(model_path)
 
 # Get model metadata
 input_name = session.get_inputs()[0].name
 input_shape = session.get_inputs()[0].shape
+# Models with normalization fused in take raw uint8 pixels
+input_is_uint8 = session.get_inputs()[0].type == "tensor(uint8)"
 output_name = session.get_outputs()[0].name
 
 print(f"Model input name: {input_name}, shape: {input_shape}")
 print(f"Model output name: {output_name}")
 
 # Get the first image from the test_images directory
-test_images = glob.glob("test_images/*.*")
+test_images = list_images("test_images")
 if not test_images:
     raise FileNotFoundError("No test images found in test_images directory")
 
 test_image_path = test_images[0]
 print(f"Using test image: {test_image_path}")
 
-def preprocess_image(image_path, input_shape):
-    # Read the image
-    img = cv2.imread(image_path)
-    if img is None:
-        raise FileNotFoundError(f"Could not read image at {image_path}")
-    
-    # Resize to model's expected input dimensions
-    height, width = input_shape[2], input_shape[3] if len(input_shape) > 3 else input_shape[1:3]
-    img = cv2.resize(img, (width, height))
+def preprocess_image(image_path, input_shape, as_uint8=False):
+    # Read the image, resized to model's expected input dimensions
+    # (NHWC: batch, height, width, channels)
+    height, width = input_shape[1], input_shape[2]
+    img = read_resized(image_path, width, height)
     
     # Convert from BGR to RGB (if using OpenCV)
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
     
-    # Normalize pixel values to [0, 1]
-    img = img.astype(np.float32) / 255.0
-    
-    # Transpose to NCHW format if required by the model
-    # img = np.transpose(img, (2, 0, 1))
+    # Normalize pixel values to [0, 1] unless the model does it itself
+    if not as_uint8:
+        img = img.astype(np.float32) / 255.0
     
     # Add batch dimension
-    img = np.expand_dims(img, axis=0)
-    
-    return img
+    return img[np.newaxis]
 
 # Test inference with the model
 try:
     print(f"Preprocessing test image: {test_image_path}")
-    input_data = preprocess_image(test_image_path, input_shape)
+    input_data = preprocess_image(test_image_path, input_shape, input_is_uint8)
     
     print("Running inference...")
     start_time = time.time()
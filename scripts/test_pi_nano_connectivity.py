@@ -14,49 +14,69 @@ import time
 import requests
 import argparse
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-def check_basic_connectivity(host, port=22):
+# The probes run on worker threads; serialize their output so lines don't interleave
+_print_lock = threading.Lock()
+
+def report(message):
+    """Print one line of probe output."""
+    with _print_lock:
+        print(message)
+
+def create_http_session():
+    """Create one keep-alive session so all HTTP checks share a connection to the Nano."""
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0))
+    return session
+
+def check_basic_connectivity(host, port=22, timeout=0.5):
     """Test basic connectivity to the host using a socket connection."""
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.settimeout(5)
     try:
-        s.connect((host, port))
-        s.close()
-        print(f"✅ Basic connectivity to {host}:{port} successful")
+        with socket.create_connection((host, port), timeout=timeout):
+            pass
+        report(f"✅ Basic connectivity to {host}:{port} successful")
         return True
-    except socket.error as e:
-        print(f"❌ Cannot connect to {host}:{port}: {e}")
+    except OSError as e:
+        report(f"❌ Cannot connect to {host}:{port}: {e}")
         return False
 
-def check_http_connectivity(host, port=8000):
-    """Test HTTP connectivity to the host."""
+def check_http_connectivity(host, port=8000, session=None, timeout=3):
+    """Test HTTP connectivity to the host.
+
+    Sends HEAD /health, falling back to HEAD / if the server has no /health
+    endpoint. A server that can't answer within timeout on the LAN is treated
+    as down rather than retried.
+    """
+    session = session or requests
     url = f"http://{host}:{port}/health"
     try:
-        response = requests.get(url, timeout=10)
+        response = session.head(url, timeout=timeout, allow_redirects=False)
+        if response.status_code in (404, 405, 501):
+            # /health (or HEAD on it) isn't implemented; try the root page instead
+            response = session.head(f"http://{host}:{port}/", timeout=timeout,
+                                    allow_redirects=False)
+            if response.status_code < 400:
+                report(f"✅ Basic HTTP connectivity to {host}:{port} successful")
+                return True
         if response.status_code == 200:
-            print(f"✅ HTTP connectivity to {host}:{port} successful")
-            print(f"Response: {response.text}")
+            report(f"✅ HTTP connectivity to {host}:{port} successful")
             return True
-        else:
-            print(f"❌ HTTP request failed with status code: {response.status_code}")
-            return False
+        report(f"❌ HTTP request failed with status code: {response.status_code}")
+        return False
     except requests.exceptions.RequestException as e:
-        print(f"❌ HTTP connection failed: {e}")
-        # Try a simpler endpoint in case /health isn't implemented
-        try:
-            alt_url = f"http://{host}:{port}/"
-            response = requests.get(alt_url, timeout=10)
-            print(f"✅ Basic HTTP connectivity to {host}:{port} successful")
-            return True
-        except:
-            return False
+        report(f"❌ HTTP connection failed: {e}")
+        return False
 
-def send_test_message(host, port=8000):
+def send_test_message(host, port=8000, session=None):
     """Send a test message to the server."""
+    session = session or requests
     url = f"http://{host}:{port}/test"
     payload = {"test": "message", "timestamp": time.time()}
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = session.post(url, json=payload, timeout=10)
         if response.status_code == 200:
             print(f"✅ Test message sent successfully to {host}:{port}")
             print(f"Response: {response.text}")
@@ -73,26 +93,45 @@ def main():
     parser.add_argument('host', help='IP address or hostname of the Jetson Nano')
     parser.add_argument('--port', type=int, default=8000, help='Port for HTTP tests (default: 8000)')
     parser.add_argument('--ssh', action='store_true', help='Also test SSH connectivity')
+    parser.add_argument('--probe-timeout', type=float, default=0.5,
+                        help='Timeout in seconds for the TCP and SSH probes '
+                             '(default: 0.5, raise it over a WAN)')
     
     args = parser.parse_args()
     
     print(f"Testing connectivity to Jetson Nano at {args.host}...")
     
-    # Test basic connectivity
-    basic_conn = check_basic_connectivity(args.host, args.port)
+    # Resolve the hostname once and probe the address, so a slow resolver is
+    # only waited on once instead of by every probe
+    try:
+        address = socket.getaddrinfo(args.host, args.port, type=socket.SOCK_STREAM)[0][4][0]
+    except socket.gaierror as e:
+        print(f"❌ DNS lookup for {args.host} failed: {e}")
+        sys.exit(2)
+    # IPv6 literals need brackets inside URLs
+    url_host = f"[{address}]" if ":" in address else address
+    
+    # The probes are independent, so run them together; when the Nano is down
+    # the wait is the longest single timeout rather than the sum of them
+    session = create_http_session()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        basic_future = executor.submit(check_basic_connectivity, address, args.port,
+                                       args.probe_timeout)
+        if args.ssh:
+            ssh_future = executor.submit(check_basic_connectivity, address, 22, args.probe_timeout)
+        http_future = executor.submit(check_http_connectivity, url_host, args.port, session)
     
-    # Test SSH if requested
+    basic_conn = basic_future.result()
+    http_conn = http_future.result()
     if args.ssh:
-        ssh_conn = check_basic_connectivity(args.host, 22)
+        ssh_conn = ssh_future.result()
         if not ssh_conn:
             print("SSH connectivity failed - make sure SSH is enabled on the Nano")
     
-    # Test HTTP connectivity
-    http_conn = check_http_connectivity(args.host, args.port)
-    
     # Send test message if HTTP connectivity works
     if http_conn:
-        send_test_message(args.host, args.port)
+        send_test_message(url_host, args.port, session)
+    session.close()
     
     # Print summary
     print("\n-------- Connectivity Test Summary --------")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import time
+import random
 import pigpio
 import sys
 import subprocess
@@ -18,14 +19,37 @@ def check_port_available(port=8888):
         print(f"Error checking port: {e}")
         return False
 
+def wait_for_port(port=8888, timeout=5.0, initial_interval=0.01, max_interval=0.1):
+    """Wait until something is listening on port, polling with a growing interval.
+
+    Returns True as soon as the port accepts connections, False after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    interval = initial_interval
+    while True:
+        if check_port_available(port):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+def _process_name(pid):
+    """Return the command name of a process, or None if it has gone away."""
+    try:
+        with open(f'/proc/{pid}/comm') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
 def check_pigpiod_running():
     """Check if pigpiod is running and return its PID."""
+    # Scan /proc directly rather than forking pgrep on every check
     try:
-        result = subprocess.run(['pgrep', 'pigpiod'], capture_output=True, text=True)
-        if result.returncode == 0:
-            pid = result.stdout.strip()
-            print(f"Found pigpiod process with PID: {pid}")
-            return pid
+        for pid in os.listdir('/proc'):
+            if pid.isdigit() and _process_name(pid) == 'pigpiod':
+                print(f"Found pigpiod process with PID: {pid}")
+                return pid
         print("No pigpiod process found")
         return None
     except Exception as e:
@@ -49,40 +73,71 @@ def start_pigpiod():
             if result.stderr:
                 print(f"Pigpiod start errors: {result.stderr}")
             
-            print("Waiting for pigpiod to initialize...")
-            time.sleep(10)  # Increased wait time
+            # A missing binary won't appear by waiting or retrying
+            if result.returncode == 127 or "command not found" in result.stderr:
+                print("pigpiod is not installed. Install it with: sudo apt-get install pigpio")
+                return False
             
-            # Verify port is listening
-            if check_port_available():
+            # Wait for the daemon to start listening instead of sleeping a fixed time
+            print("Waiting for pigpiod to initialize...")
+            if wait_for_port(8888, timeout=10.0):
                 print("Port 8888 is now listening")
             else:
                 print("Warning: Port 8888 is not listening")
                 
+        except FileNotFoundError as e:
+            print(f"Cannot start pigpiod, required command missing: {e}")
+            return False
         except Exception as e:
             print(f"Error starting pigpiod: {e}")
             return False
     return True
 
-def test_pigpiod_connection(max_retries=5, delay=3):
-    """Test connection to pigpiod with retries."""
-    # First ensure pigpiod is running
-    if not start_pigpiod():
-        return False
+def retry_with_backoff(fn, max_retries=5, base=0.25, cap=8.0, jitter=0.5):
+    """Call fn until it returns True, sleeping with exponential backoff between attempts.
 
+    The delay before retry n is min(cap, base * 2**n), stretched by up to
+    `jitter` of itself. Connection errors are retried; anything else (such
+    as PermissionError or FileNotFoundError) is raised immediately.
+    """
     for attempt in range(max_retries):
         try:
             print(f"Attempt {attempt + 1}/{max_retries} to connect to pigpiod...")
-            pi = pigpio.pi()
-            if pi.connected:
-                print("Successfully connected to pigpiod!")
-                pi.stop()
+            if fn():
                 return True
-        except Exception as e:
+        except (PermissionError, FileNotFoundError):
+            raise
+        except (pigpio.error, socket.error) as e:
             print(f"Connection attempt failed: {e}")
         
         if attempt < max_retries - 1:
-            print(f"Waiting {delay} seconds before next attempt...")
+            delay = min(cap, base * 2 ** attempt) * (1 + random.uniform(0, jitter))
+            print(f"Waiting {delay:.2f} seconds before next attempt...")
             time.sleep(delay)
+    return False
+
+def _try_connect(host='localhost', port=8888):
+    """Open and close one pigpiod connection, returning whether it succeeded."""
+    pi = pigpio.pi(host, port)
+    if not pi.connected:
+        return False
+    print("Successfully connected to pigpiod!")
+    pi.stop()
+    return True
+
+def test_pigpiod_connection(max_retries=5):
+    """Test connection to pigpiod with retries."""
+    # First ensure pigpiod is running
+    if not start_pigpiod():
+        return False
+
+    try:
+        if retry_with_backoff(lambda: _try_connect('localhost', 8888), max_retries=max_retries):
+            return True
+    except (PermissionError, FileNotFoundError) as e:
+        # Configuration problems that no amount of retrying will fix
+        print(f"Cannot connect to pigpiod: {e}")
+        return False
     
     print("Failed to connect to pigpiod after all attempts")
     return False
@@ -1,11 +1,13 @@
 """Setup script for the Bird Camera project."""
 from setuptools import setup, find_packages
 
-with open("README.md", "r") as fh:
+with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
-with open("requirements.txt", "r") as f:
-    requirements = f.read().splitlines()
+# Skip blank lines and comments so only real requirement specifiers reach pip
+with open("requirements.txt", "r", encoding="utf-8") as f:
+    requirements = [line.strip() for line in f
+                    if line.strip() and not line.lstrip().startswith("#")]
 
 setup(
     name="bird_cam",
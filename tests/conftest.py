@@ -0,0 +1,8 @@
+"""Shared pytest setup for the unit tests."""
+import sys
+from pathlib import Path
+
+# Make the project root importable once for every test module
+ROOT = str(Path(__file__).resolve().parent.parent)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -8,11 +8,21 @@ import time
 import os
 import signal
 import sys
-import datetime
 
 # Default GPIO pin
 PIN = 4
 
+# HH:MM:SS of the last second formatted by format_timestamp
+_timestamp_cache = {'second': None, 'prefix': ''}
+
+def format_timestamp(t):
+    """Format a time.time() value as HH:MM:SS.mmm, formatting HH:MM:SS once per second"""
+    second = int(t)
+    if second != _timestamp_cache['second']:
+        _timestamp_cache['prefix'] = time.strftime("%H:%M:%S", time.localtime(second))
+        _timestamp_cache['second'] = second
+    return f"{_timestamp_cache['prefix']}.{int((t - second) * 1000):03d}"
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C to exit cleanly"""
     print("\nMonitoring stopped.")
@@ -30,7 +40,7 @@ def main():
 
     print(f"PIR Sensor Debug - Using GPIO pin {pin}")
     print("---------------------------------------------")
-    print("This will continuously display the sensor state.")
+    print("This will display every change of the sensor state.")
     print("Press Ctrl+C to exit\n")
     
     # Connect to pigpio daemon
@@ -44,38 +54,31 @@ def main():
     pi.set_mode(pin, pigpio.INPUT)
     
     # Initial state
-    last_state = pi.read(pin)
-    last_change = time.time()
+    last = {'level': pi.read(pin), 'tick': pi.get_current_tick()}
+    print(f"Initial state: {'HIGH (1)' if last['level'] == 1 else 'LOW (0) '}")
+    
+    def on_edge(gpio, level, tick):
+        # Format timestamp
+        timestamp = format_timestamp(time.time())
+        
+        # Display state with clear indication
+        state_str = "HIGH (1)" if level == 1 else "LOW (0) "
+        
+        # tickDiff handles the 32-bit microsecond tick wrapping around
+        change_time = pigpio.tickDiff(last['tick'], tick) / 1e6
+        print(f"[{timestamp}] State CHANGED to {state_str} (after {change_time:.6f}s)")
+        last['level'] = level
+        last['tick'] = tick
+    
+    # pigpiod delivers edges as they happen, so nothing polls the pin
+    callback = pi.callback(pin, pigpio.EITHER_EDGE, on_edge)
     
     try:
-        while True:
-            # Get current state and timestamp
-            current_state = pi.read(pin)
-            current_time = time.time()
-            
-            # Format timestamp
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            
-            # Display state with clear indication
-            state_str = "HIGH (1)" if current_state == 1 else "LOW (0) "
-            
-            # Add indication for change
-            if current_state != last_state:
-                change_time = current_time - last_change
-                print(f"[{timestamp}] State CHANGED to {state_str} (after {change_time:.3f}s)")
-                last_state = current_state
-                last_change = current_time
-            else:
-                # Only print every second to avoid flooding the terminal
-                if int(current_time) % 1 == 0:
-                    print(f"[{timestamp}] Current state: {state_str}")
-            
-            # Small delay
-            time.sleep(0.1)
-            
+        signal.pause()
     except KeyboardInterrupt:
         pass
     finally:
+        callback.cancel()
         if pi.connected:
             pi.stop()
         print("Monitoring ended.")
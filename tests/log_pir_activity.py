@@ -6,8 +6,34 @@ This will run for a set time and record all state changes.
 import pigpio
 import time
 import os
+import sys
 import datetime
 import argparse
+import threading
+from collections import deque
+
+# Buffered log lines are written out once this many are pending...
+FLUSH_EVENTS = 32
+# ...or once this many seconds have passed since the last write
+FLUSH_INTERVAL = 1.0
+# Most buffers a single os.writev call accepts
+IOV_MAX = os.sysconf('SC_IOV_MAX') if hasattr(os, 'sysconf') else 1024
+
+# HH:MM:SS of the last second formatted by format_timestamp
+_timestamp_cache = {'second': None, 'prefix': ''}
+
+def format_timestamp(t):
+    """Format a time.time() value as HH:MM:SS.mmm, formatting HH:MM:SS once per second"""
+    second = int(t)
+    if second != _timestamp_cache['second']:
+        _timestamp_cache['prefix'] = time.strftime("%H:%M:%S", time.localtime(second))
+        _timestamp_cache['second'] = second
+    return f"{_timestamp_cache['prefix']}.{int((t - second) * 1000):03d}"
+
+def write_lines(fd, lines):
+    """Write a list of bytes lines to fd with gathered writes, no joining."""
+    for start in range(0, len(lines), IOV_MAX):
+        os.writev(fd, lines[start:start + IOV_MAX])
 
 def main():
     # Parse command line arguments
@@ -41,60 +67,78 @@ def main():
     # Initial state
     last_state = pi.read(PIR_PIN)
     
-    # Open log file
-    with open(LOG_FILE, 'w') as log:
+    # Open log file unbuffered: batches go straight to its fd with os.writev
+    with open(LOG_FILE, 'wb', buffering=0) as log:
         # Write header
-        log.write(f"PIR Activity Log - Pin {PIR_PIN}\n")
-        log.write(f"Started at: {datetime.datetime.now()}\n")
-        log.write(f"Initial state: {'HIGH (1)' if last_state == 1 else 'LOW (0)'}\n")
-        log.write("-" * 50 + "\n")
+        write_lines(log.fileno(), [
+            f"PIR Activity Log - Pin {PIR_PIN}\n".encode(),
+            f"Started at: {datetime.datetime.now()}\n".encode(),
+            f"Initial state: {'HIGH (1)' if last_state == 1 else 'LOW (0)'}\n".encode(),
+            b"-" * 50 + b"\n",
+        ])
         
-        # Record start time
-        start_time = time.time()
-        end_time = start_time + DURATION
-        changes = 0
-        last_change_time = start_time
+        stats = {'changes': 0, 'last_level': last_state, 'last_tick': pi.get_current_tick()}
+        # Lines formatted by the callback thread, written out by the main thread
+        pending = deque()
+        pending_lock = threading.Lock()
+        burst = threading.Event()
         
-        # Monitor until duration is reached
-        while time.time() < end_time:
-            # Read current state
-            current_state = pi.read(PIR_PIN)
+        def on_edge(gpio, level, tick):
+            if level == stats['last_level']:
+                return  # Watchdog timeout or repeated level, not a real change
+            stats['changes'] += 1
+            # tickDiff gives microsecond spacing between edges, wrap-safe
+            since_last = pigpio.tickDiff(stats['last_tick'], tick) / 1e6
+            timestamp = format_timestamp(time.time())
             
-            # If state changed
-            if current_state != last_state:
-                changes += 1
-                now = time.time()
-                elapsed = now - start_time
-                since_last = now - last_change_time
-                timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                
-                # Build log message
-                if current_state == 1:
-                    message = f"[{timestamp}] Motion DETECTED! (Change #{changes}, after {since_last:.3f}s)"
-                else:
-                    message = f"[{timestamp}] Motion ENDED (Change #{changes}, after {since_last:.3f}s)"
-                
-                # Write to log and console
-                log.write(message + "\n")
-                log.flush()  # Ensure it's written immediately
-                print(message)
-                
-                # Update state and time
-                last_state = current_state
-                last_change_time = now
+            # Build log message
+            if level == 1:
+                message = (f"[{timestamp}] Motion DETECTED! "
+                           f"(Change #{stats['changes']}, after {since_last:.6f}s)")
+            else:
+                message = (f"[{timestamp}] Motion ENDED "
+                           f"(Change #{stats['changes']}, after {since_last:.6f}s)")
             
-            # Small delay to prevent CPU hogging
-            time.sleep(0.01)  # Smaller delay for more precise timing
-            
-        # Log summary
-        remaining = int(DURATION - (time.time() - start_time))
-        if remaining > 0:
-            time.sleep(remaining)  # Wait for exactly the specified duration
+            with pending_lock:
+                pending.append(f"{message}\n".encode())
+                if len(pending) >= FLUSH_EVENTS:
+                    burst.set()
             
+            # Update state and tick
+            stats['last_level'] = level
+            stats['last_tick'] = tick
+        
+        def drain():
+            """Write all pending lines to the log and console in one go."""
+            with pending_lock:
+                lines = list(pending)
+                pending.clear()
+                burst.clear()
+            if lines:
+                write_lines(log.fileno(), lines)
+                # Anything print() buffered must reach the console first
+                sys.stdout.flush()
+                write_lines(sys.stdout.fileno(), lines)
+        
+        # pigpiod timestamps edges as they happen, so the callback only queues
+        # lines and the main thread batches the file and console writes
+        end_time = time.monotonic() + DURATION
+        callback = pi.callback(PIR_PIN, pigpio.EITHER_EDGE, on_edge)
+        try:
+            while True:
+                remaining = end_time - time.monotonic()
+                if remaining <= 0:
+                    break
+                burst.wait(min(FLUSH_INTERVAL, remaining))
+                drain()
+        finally:
+            callback.cancel()
+            drain()
+        changes = stats['changes']
+        
         end_message = f"\nLogging completed at {datetime.datetime.now()}"
         summary = f"Total changes detected: {changes} in {DURATION} seconds"
-        log.write(end_message + "\n")
-        log.write(summary + "\n")
+        write_lines(log.fileno(), [f"{end_message}\n".encode(), f"{summary}\n".encode()])
         print(end_message)
         print(summary)
     
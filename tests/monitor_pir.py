@@ -39,39 +39,35 @@ def main():
     last_state = pi.read(PIR_PIN)
     print(f"Initial state: {'HIGH (1)' if last_state == 1 else 'LOW (0)'}")
     
-    # Monitor changes
-    changes = 0
-    start_time = time.time()
+    # Monitor changes. pigpiod reports each edge with its level and a
+    # microsecond tick, so the main thread can sleep until Ctrl+C
+    state = {'changes': 0, 'last_level': last_state, 'last_tick': pi.get_current_tick()}
+    
+    def on_edge(gpio, level, tick):
+        if level == state['last_level']:
+            return  # Watchdog timeout or repeated level, not a real change
+        state['changes'] += 1
+        timestamp = time.strftime("%H:%M:%S")
+        elapsed = pigpio.tickDiff(state['last_tick'], tick) / 1e6
+        
+        if level == 1:
+            print(f"[{timestamp}] Motion DETECTED! "
+                  f"(Change #{state['changes']}, after {elapsed:.1f}s)")
+        else:
+            print(f"[{timestamp}] Motion ENDED (Change #{state['changes']}, after {elapsed:.1f}s)")
+        
+        state['last_level'] = level
+        state['last_tick'] = tick
+    
+    callback = pi.callback(PIR_PIN, pigpio.EITHER_EDGE, on_edge)
     
     try:
-        while True:
-            # Read current state
-            current_state = pi.read(PIR_PIN)
-            
-            # If state changed
-            if current_state != last_state:
-                changes += 1
-                timestamp = time.strftime("%H:%M:%S")
-                elapsed = time.time() - start_time
-                
-                if current_state == 1:
-                    print(f"[{timestamp}] Motion DETECTED! (Change #{changes}, after {elapsed:.1f}s)")
-                else:
-                    print(f"[{timestamp}] Motion ENDED (Change #{changes}, after {elapsed:.1f}s)")
-                
-                # Reset timer
-                start_time = time.time()
-                
-                # Update last state
-                last_state = current_state
-            
-            # Small delay to prevent CPU hogging
-            time.sleep(0.1)
-            
+        signal.pause()
     except KeyboardInterrupt:
         # This will be caught by the signal handler
         pass
     finally:
+        callback.cancel()
         if pi.connected:
             pi.stop()
 
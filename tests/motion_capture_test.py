@@ -6,32 +6,61 @@ This is a simplified version of the main application for testing purposes.
 import pigpio
 import time
 import os
-import datetime
-import subprocess
 import argparse
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from picamera2 import Picamera2
+
+# Timestamps are formatted by the logging handler from the record's creation time
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S', stream=sys.stdout)
+logger = logging.getLogger(__name__)
+
+# Captures allowed to be queued or running at once; motion beyond this is skipped
+MAX_PENDING_CAPTURES = 3
+# pigpiod ignores PIR level changes shorter than this (microseconds), so a
+# single noisy spike doesn't cost a capture
+GLITCH_FILTER_US = 20000
 
 def log_event(message):
     """Log a message to console with timestamp."""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] {message}"
-    print(log_entry)
+    logger.info(message)
 
-def take_photo(output_dir="data/photos", prefix="test"):
-    """Capture a photo using libcamera."""
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{output_dir}/{prefix}_{timestamp}.jpg"
-    
-    # Ensure directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Capture photo using libcamera-still
-    cmd = f"libcamera-still -o {filename} --immediate"
-    log_event(f"Capturing photo: {filename}")
-    subprocess.run(cmd, shell=True)
-    log_event(f"Photo saved: {filename}")
-    
-    return filename
+class CaptureService:
+    """Keeps one Picamera2 instance running for every capture in the test.
+
+    Starting libcamera-still per photo re-initialises the camera and reruns
+    auto exposure each time; a running camera only has to save the next frame.
+    """
+
+    def __init__(self, output_dir="data/photos"):
+        # The output directory is expected to exist already (created once in main)
+        self.output_dir = output_dir
+        self.picam = Picamera2()
+        self.picam.configure(self.picam.create_still_configuration())
+        self.picam.start()
+
+    def capture(self, prefix="test"):
+        """Capture a photo and return its filename, or None if it failed."""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        filename = f"{self.output_dir}/{prefix}_{timestamp}.jpg"
+        
+        log_event(f"Capturing photo: {filename}")
+        try:
+            self.picam.capture_file(filename)
+        except Exception as e:
+            log_event(f"Capture failed for {filename}: {e}")
+            return None
+        log_event(f"Photo saved: {filename}")
+        
+        return filename
+
+    def close(self):
+        """Release the camera."""
+        self.picam.close()
 
 def main():
     # Parse command line arguments
@@ -53,12 +82,19 @@ def main():
     log_event(f"Using GPIO pin {PIR_PIN}")
     log_event(f"Photos will be saved to {os.path.abspath(PHOTO_DIR)}")
     
+    # Create the photo directory once rather than on every capture
+    os.makedirs(PHOTO_DIR, exist_ok=True)
+    
+    # Start the camera once for the whole test
+    camera = CaptureService(PHOTO_DIR)
+    
     # Take an initial test photo
     log_event("Taking initial test photo...")
-    test_photo = take_photo(PHOTO_DIR, "init_test")
+    test_photo = camera.capture("init_test")
     
     # If only testing the camera, exit here
     if args.test_only:
+        camera.close()
         log_event("Camera test complete. Exiting.")
         return
     
@@ -69,10 +105,12 @@ def main():
     pi = pigpio.pi()
     if not pi.connected:
         log_event("Failed to connect to pigpio daemon. Try running: sudo systemctl start pigpiod")
+        camera.close()
         return
     
     # Set pin mode
     pi.set_mode(PIR_PIN, pigpio.INPUT)
+    pi.set_glitch_filter(PIR_PIN, GLITCH_FILTER_US)
     
     log_event("PIR sensor initialized successfully")
     log_event("Sensor warming up (5 seconds)...")
@@ -84,48 +122,71 @@ def main():
     
     # Record start time
     start_time = time.time()
-    end_time = start_time + DURATION
-    last_motion_time = 0
-    last_state = pi.read(PIR_PIN)
-    photo_count = 0
+    # Callbacks run on pigpio's thread, so their shared state is locked
+    lock = threading.Lock()
+    state = {'last_motion_time': None, 'photo_count': 0}
+    pending = []
+    # One worker: the camera takes one capture at a time, so captures run
+    # one after another off the callback thread
+    capture_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
     
-    try:
-        while time.time() < end_time:
-            # Read the current state
-            current_state = pi.read(PIR_PIN)
-            
-            # Check if motion was detected (rising edge: 0->1)
-            if current_state == 1 and last_state == 0:
-                current_time = time.time()
-                
-                # Check if we're past the cooldown period
-                if current_time - last_motion_time > COOLDOWN_TIME:
-                    log_event("Motion detected!")
-                    photo_path = take_photo(PHOTO_DIR, "motion")
-                    last_motion_time = current_time
-                    photo_count += 1
-                else:
-                    log_event(f"Motion detected but within cooldown period ({COOLDOWN_TIME}s)")
-            
-            # Update last state
-            last_state = current_state
+    def count_finished():
+        """Count photos saved by finished captures and drop them from pending."""
+        saved = 0
+        for future in [f for f in pending if f.done()]:
+            pending.remove(future)
+            if future.result():
+                saved += 1
+        return saved
+    
+    def on_motion(gpio, level, tick):
+        with lock:
+            # Collect captures that finished since the last edge
+            state['photo_count'] += count_finished()
             
-            # Small delay to prevent CPU hogging
-            time.sleep(0.1)
+            # Check if we're past the cooldown period. pigpiod's 32-bit tick
+            # wraps about every 72 minutes, so time it with the monotonic clock
+            now = time.monotonic()
+            last_time = state['last_motion_time']
+            if last_time is not None and now - last_time <= COOLDOWN_TIME:
+                log_event(f"Motion detected but within cooldown period ({COOLDOWN_TIME}s)")
+                return
             
+            log_event("Motion detected!")
+            if len(pending) < MAX_PENDING_CAPTURES:
+                # Capture in the background so the callback returns straight away
+                pending.append(capture_pool.submit(camera.capture, "motion"))
+            else:
+                log_event(f"{len(pending)} captures still running, skipping this one")
+            state['last_motion_time'] = now
+    
+    # pigpiod reports rising edges (0->1) as they happen; the main thread
+    # just sleeps until the test time is up
+    callback = pi.callback(PIR_PIN, pigpio.RISING_EDGE, on_motion)
+    
+    try:
+        time.sleep(DURATION)
     except KeyboardInterrupt:
         log_event("Test stopped by user")
     except Exception as e:
         log_event(f"Error: {e}")
     finally:
+        callback.cancel()
+        
+        # Let queued captures finish before reporting
+        capture_pool.shutdown(wait=True)
+        with lock:
+            state['photo_count'] += count_finished()
+        
         # Clean up
+        camera.close()
         if pi.connected:
             pi.stop()
         
         # Summary
         elapsed = time.time() - start_time
         log_event(f"Test completed. Duration: {elapsed:.1f} seconds")
-        log_event(f"Total photos captured: {photo_count}")
+        log_event(f"Total photos captured: {state['photo_count']}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -7,6 +7,18 @@ from picamera2 import Picamera2
 import time
 import os
 
+# Longest time to wait for auto exposure to settle after starting the camera
+WARMUP_TIMEOUT = 2
+
+def wait_for_exposure(picam, timeout=WARMUP_TIMEOUT):
+    """Wait until auto exposure reports locked, for at most timeout seconds."""
+    # Each capture_metadata call returns with the next frame, so this ends
+    # as soon as a frame says exposure has settled (or AE is off)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if picam.capture_metadata().get("AeLocked", True):
+            return
+
 def main():
     print('Initializing camera...')
     
@@ -17,7 +29,7 @@ def main():
     
     print('Starting camera...')
     picam.start()
-    time.sleep(2)  # Warm-up time
+    wait_for_exposure(picam)
     
     # Create unique filename with timestamp
     timestamp = time.strftime('%Y%m%d-%H%M%S')
@@ -6,29 +6,43 @@ import os
 import time
 from datetime import datetime
 
-# Add src directory to path to import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from src.camera.camera_handler import CameraHandler
+from src.camera.camera_handler import CameraHandler, MockPicamera2, MockCompletedRequest
 
 
 class TestCameraHandler(unittest.TestCase):
     """Test cases for CameraHandler class."""
 
-    @patch('src.camera.camera_handler.Picamera2')
-    @patch('src.camera.camera_handler.time.sleep')
-    def setUp(self, mock_sleep, mock_picamera):
+    @classmethod
+    def setUpClass(cls):
+        """Patch the camera class and sleep once for all tests."""
+        cls._picamera_patcher = patch('src.camera.camera_handler.Picamera2')
+        cls.mock_picamera = cls._picamera_patcher.start()
+        cls._sleep_patcher = patch('src.camera.camera_handler.time.sleep')
+        cls.mock_sleep = cls._sleep_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Undo the class-wide patches."""
+        cls._sleep_patcher.stop()
+        cls._picamera_patcher.stop()
+
+    def setUp(self):
         """Set up test fixtures."""
+        self.mock_picamera.reset_mock()
+        self.mock_sleep.reset_mock()
         self.mock_camera = MagicMock()
-        mock_picamera.return_value = self.mock_camera
+        self.mock_camera.capture_metadata.return_value = {"AeLocked": True}
+        self.mock_picamera.return_value = self.mock_camera
         
         self.resolution = (1920, 1080)
         self.rotation = 90
         self.camera_handler = CameraHandler(self.resolution, self.rotation)
         
         # Verify camera setup was performed correctly
-        mock_picamera.assert_called_once()
-        mock_sleep.assert_called_once_with(0.5)
+        self.mock_picamera.assert_called_once()
+        # Settling waits for a frame with exposure locked, not a fixed sleep
+        self.mock_camera.capture_metadata.assert_called_once()
+        self.mock_sleep.assert_not_called()
 
     def test_init(self):
         """Test initialization of CameraHandler."""
@@ -41,18 +55,28 @@ class TestCameraHandler(unittest.TestCase):
         """Test camera setup."""
         # Check that camera methods were called with correct arguments
         self.mock_camera.create_still_configuration.assert_called_once_with(
-            main={"size": self.resolution}
+            main={"size": self.resolution, "format": CameraHandler.STILL_FORMAT},
+            buffer_count=CameraHandler.BUFFER_COUNT,
+            display=None,
+            controls={
+                "AfMode": 0,
+                "LensPosition": 1.25,
+                "AeEnable": False,
+                "ExposureTime": 5000,
+            }
         )
         self.mock_camera.configure.assert_called_once()
         self.mock_camera.start.assert_called_once()
 
     @patch('os.makedirs')
-    def test_take_photo(self, mock_makedirs):
+    @patch('src.camera.camera_handler._load_jpeg_encoder', return_value=None)
+    def test_take_photo(self, mock_encoder, mock_makedirs):
         """Test taking a photo."""
         output_path = '/tmp/test_photo.jpg'
         
-        # Mock camera capture method
-        self.mock_camera.capture_file.return_value = None
+        # Mock camera capture request
+        mock_request = MagicMock()
+        self.mock_camera.capture_request.return_value = mock_request
         
         # Call the method
         result = self.camera_handler.take_photo(output_path)
@@ -60,15 +84,66 @@ class TestCameraHandler(unittest.TestCase):
         # Check directory was created
         mock_makedirs.assert_called_once_with(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
         
-        # Check camera was used to capture photo
-        self.mock_camera.capture_file.assert_called_once_with(output_path)
+        # Check a request was captured, saved and released
+        self.mock_camera.capture_request.assert_called_once()
+        mock_request.save.assert_called_once_with("main", output_path)
+        mock_request.release.assert_called_once()
         
         # Check result
         self.assertEqual(result, output_path)
 
+    @patch('os.makedirs')
+    @patch('src.camera.camera_handler._load_jpeg_encoder')
+    def test_take_photo_turbojpeg(self, mock_load_encoder, mock_makedirs):
+        """Test that frames are encoded with libjpeg-turbo when it's available."""
+        output_path = '/tmp/test_photo.jpg'
+        mock_request = MagicMock()
+        self.mock_camera.capture_request.return_value = mock_request
+        encoder = mock_load_encoder.return_value
+        encoder.encode.return_value = b'jpeg'
+        mock_turbojpeg = MagicMock()
+        
+        with patch.dict(sys.modules, {'turbojpeg': mock_turbojpeg}), \
+             patch('builtins.open', mock_open()) as mock_file:
+            self.camera_handler.take_photo(output_path)
+        
+        # The frame is copied out and the request released before encoding
+        mock_request.make_array.assert_called_once_with("main")
+        mock_request.release.assert_called_once()
+        mock_request.save.assert_not_called()
+        encoder.encode.assert_called_once_with(
+            mock_request.make_array.return_value,
+            quality=CameraHandler.JPEG_QUALITY,
+            pixel_format=mock_turbojpeg.TJPF_RGB,
+            jpeg_subsample=mock_turbojpeg.TJSAMP_420
+        )
+        mock_file.assert_called_once_with(output_path, 'wb')
+        mock_file().write.assert_called_once_with(b'jpeg')
+
+    @patch('os.makedirs')
+    @patch('src.camera.camera_handler._load_jpeg_encoder', return_value=None)
+    def test_take_photo_creates_directory_once(self, mock_encoder, mock_makedirs):
+        """Test that repeated photos to one directory only create it once."""
+        self.camera_handler.take_photo('/tmp/photos/first.jpg')
+        self.camera_handler.take_photo('/tmp/photos/second.jpg')
+        
+        mock_makedirs.assert_called_once_with('/tmp/photos', exist_ok=True)
+
+    @patch('os.makedirs')
+    @patch('src.camera.camera_handler._load_jpeg_encoder', return_value=None)
+    def test_take_photo_resolves_directory_once(self, mock_encoder, mock_makedirs):
+        """Test that a relative output directory is only made absolute on first use."""
+        with patch('os.path.abspath', side_effect=lambda p: '/cwd/' + p) as mock_abspath:
+            self.camera_handler.take_photo('photos/first.jpg')
+            self.camera_handler.take_photo('photos/second.jpg')
+        
+        mock_abspath.assert_called_once_with('photos')
+        mock_makedirs.assert_called_once_with('/cwd/photos', exist_ok=True)
+
     @patch('os.makedirs')
     @patch('src.camera.camera_handler.datetime')
-    def test_take_timelapse_photos(self, mock_datetime, mock_makedirs):
+    @patch('src.camera.camera_handler._load_jpeg_encoder', return_value=None)
+    def test_take_timelapse_photos(self, mock_encoder, mock_datetime, mock_makedirs):
         """Test taking timelapse photos."""
         output_dir = '/tmp/timelapse'
         interval = 2
@@ -80,33 +155,52 @@ class TestCameraHandler(unittest.TestCase):
         mock_now.strftime.side_effect = timestamps
         mock_datetime.now.return_value = mock_now
         
-        # Patch the take_photo method
-        with patch.object(self.camera_handler, 'take_photo') as mock_take_photo:
-            # Setup return values for take_photo
-            expected_paths = [
-                os.path.join(output_dir, f'timelapse_{ts}.jpg') for ts in timestamps
-            ]
-            mock_take_photo.side_effect = expected_paths
-            
-            # Call the method
-            with patch('time.sleep') as mock_sleep:
-                result = self.camera_handler.take_timelapse_photos(
-                    output_dir, interval, count
-                )
-            
-            # Verify directory creation
-            mock_makedirs.assert_called_once_with(output_dir, exist_ok=True)
-            
-            # Verify photo taking
-            self.assertEqual(mock_take_photo.call_count, count)
-            
-            # Verify sleep between captures (not after last photo)
-            self.assertEqual(mock_sleep.call_count, count - 1)
-            for call in mock_sleep.call_args_list:
-                self.assertEqual(call[0][0], interval)
-            
-            # Verify result
-            self.assertEqual(result, expected_paths)
+        expected_paths = [
+            os.path.join(output_dir, f'timelapse_{ts}.jpg') for ts in timestamps
+        ]
+        requests = [MagicMock() for _ in range(count)]
+        self.mock_camera.capture_request.side_effect = requests
+        
+        # Call the method
+        with patch('time.sleep') as mock_sleep:
+            result = self.camera_handler.take_timelapse_photos(
+                output_dir, interval, count
+            )
+        
+        # Verify directory creation
+        mock_makedirs.assert_called_once_with(output_dir, exist_ok=True)
+        
+        # Verify every captured request was saved and released
+        self.assertEqual(self.mock_camera.capture_request.call_count, count)
+        for request, path in zip(requests, expected_paths):
+            request.save.assert_called_once_with("main", path)
+            request.release.assert_called_once()
+        
+        # Verify sleep between captures (not after last photo). Sleeps target
+        # deadlines measured from the start, and time.sleep is mocked, so the
+        # clock barely moves and the i-th wait is close to (i + 1) intervals
+        self.assertEqual(mock_sleep.call_count, count - 1)
+        for i, call in enumerate(mock_sleep.call_args_list):
+            self.assertAlmostEqual(call[0][0], (i + 1) * interval, places=1)
+        
+        # Verify result
+        self.assertEqual(result, expected_paths)
+
+    @patch('os.makedirs')
+    @patch('src.camera.camera_handler._load_jpeg_encoder', return_value=None)
+    def test_take_timelapse_photos_stop_event(self, mock_encoder, mock_makedirs):
+        """Test that setting the stop event ends the timelapse at the next wait."""
+        stop_event = MagicMock()
+        stop_event.wait.side_effect = [False, True]
+        
+        result = self.camera_handler.take_timelapse_photos(
+            '/tmp/timelapse', interval=2, count=5, stop_event=stop_event
+        )
+        
+        # Two waits: the first times out, the second returns because of the stop
+        self.assertEqual(stop_event.wait.call_count, 2)
+        self.assertEqual(self.mock_camera.capture_request.call_count, 2)
+        self.assertEqual(len(result), 2)
 
     def test_cleanup(self):
         """Test cleanup method."""
@@ -117,5 +211,18 @@ class TestCameraHandler(unittest.TestCase):
         self.assertIsNone(self.camera_handler.camera)
 
 
+class TestMockCompletedRequest(unittest.TestCase):
+    """Test cases for the mock request used off the Raspberry Pi."""
+
+    def test_make_array(self):
+        """Test that the mock frame can be copied out for the JPEG encoder."""
+        request = MockCompletedRequest(MockPicamera2())
+        frame = request.make_array("main")
+        
+        self.assertEqual(frame.shape, (1080, 1920, 3))
+        self.assertEqual(str(frame.dtype), 'uint8')
+        request.release()
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
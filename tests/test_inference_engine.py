@@ -1,11 +1,6 @@
 """Tests for the InferenceEngine module."""
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
-import os
-
-# Add src directory to path to import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.inference.inference_engine import InferenceEngine
 
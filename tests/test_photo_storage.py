@@ -1,16 +1,13 @@
 """Tests for the PhotoStorage module."""
+import io
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
-import sys
+from unittest.mock import patch, MagicMock
 import os
 import json
 import tempfile
 import shutil
 from datetime import datetime
 
-# Add src directory to path to import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from src.storage.photo_storage import PhotoStorage
 
 
@@ -27,6 +24,7 @@ class TestPhotoStorage(unittest.TestCase):
 
     def tearDown(self):
         """Clean up after tests."""
+        self.storage.close()
         # Remove the temporary directory
         shutil.rmtree(self.temp_dir)
 
@@ -49,7 +47,7 @@ class TestPhotoStorage(unittest.TestCase):
         # Check directory was created
         self.assertTrue(os.path.exists(self.base_dir))
 
-    @patch('json.load')
+    @patch('src.storage.photo_storage._json_loads')
     def test_load_metadata(self, mock_json_load):
         """Test loading metadata."""
         # Setup mock metadata
@@ -65,31 +63,96 @@ class TestPhotoStorage(unittest.TestCase):
         # Load metadata
         self.storage.load_metadata()
         
-        # Verify json.load was called
-        mock_json_load.assert_called_once()
+        # Verify the file contents were decoded
+        mock_json_load.assert_called_once_with(b"{}")
         
         # Verify metadata was set
         self.assertEqual(self.storage.metadata, mock_metadata)
         
-    @patch('json.dump')
-    def test_save_metadata(self, mock_json_dump):
+    def test_save_metadata(self):
         """Test saving metadata."""
         # Setup metadata
         self.storage.metadata = {
             "test.jpg": {"timestamp": "2022-01-01T12:00:00", "path": "/test/path"}
         }
         
-        # Mock open
-        mock_file = mock_open()
-        
-        with patch('builtins.open', mock_file):
-            self.storage.save_metadata()
+        with patch('os.replace', wraps=os.replace) as mock_replace:
+            self.assertTrue(self.storage.save_metadata())
             
-        # Verify json.dump was called with correct arguments
-        mock_json_dump.assert_called_once()
-        args, kwargs = mock_json_dump.call_args
-        self.assertEqual(args[0], self.storage.metadata)
-        self.assertEqual(kwargs.get('indent'), 2)
+        # Verify the metadata was written compactly and reads back unchanged
+        with open(self.storage.metadata_file) as f:
+            content = f.read()
+        self.assertEqual(content, json.dumps(self.storage.metadata, separators=(',', ':')))
+        self.assertEqual(json.loads(content), self.storage.metadata)
+        
+        # Verify the temporary file was renamed over the metadata file
+        mock_replace.assert_called_once_with(
+            self.storage.metadata_file + '.tmp', self.storage.metadata_file)
+        self.assertFalse(os.path.exists(self.storage.metadata_file + '.tmp'))
+
+    def test_save_metadata_atomic(self):
+        """Test that a failed save leaves the previous metadata file intact."""
+        self.storage.metadata = {"old.jpg": {"path": "/test/old"}}
+        self.assertTrue(self.storage.save_metadata())
+        
+        # Fail at the rename, after the new copy has been written
+        self.storage.metadata = {"new.jpg": {"path": "/test/new"}}
+        with patch('os.replace', side_effect=OSError("simulated crash")):
+            self.assertFalse(self.storage.save_metadata())
+        
+        with open(self.storage.metadata_file) as f:
+            self.assertEqual(json.load(f), {"old.jpg": {"path": "/test/old"}})
+        self.assertFalse(os.path.exists(self.storage.metadata_file + '.tmp'))
+
+    def test_metadata_journal_replay(self):
+        """Test that saves and deletes are journaled and replayed on startup."""
+        for i in range(3):
+            self.storage.save_photo(b'data', f'burst_{i}.jpg')
+        self.storage.delete_photo('burst_1.jpg')
+        
+        # Each change is one journal line; the metadata file isn't rewritten
+        with open(self.storage.journal_file) as f:
+            self.assertEqual(len(f.readlines()), 4)
+        self.assertFalse(os.path.exists(self.storage.metadata_file))
+        
+        reloaded = PhotoStorage(self.base_dir, self.max_photos)
+        self.assertEqual(reloaded.metadata, self.storage.metadata)
+        self.assertEqual(set(reloaded.metadata), {'burst_0.jpg', 'burst_2.jpg'})
+        reloaded._journal.close()
+
+    def test_metadata_journal_torn_entry(self):
+        """Test that an entry cut short by a crash doesn't swallow the next one."""
+        self.storage.save_photo(b'data', 'before.jpg')
+        self.storage.close()
+        with open(self.storage.journal_file, 'ab') as f:
+            f.write(b'{"op":"add","k":"torn.jpg","v":{"pa')
+        
+        restarted = PhotoStorage(self.base_dir, self.max_photos)
+        self.assertNotIn('torn.jpg', restarted.metadata)
+        restarted.save_photo(b'data', 'after.jpg', {'trigger': 'motion_detection'})
+        restarted._journal.close()
+        
+        # The entry is replayed from the journal, not re-adopted from disk
+        reloaded = PhotoStorage(self.base_dir, self.max_photos)
+        self.assertEqual(set(reloaded.metadata), {'before.jpg', 'after.jpg'})
+        self.assertEqual(reloaded.metadata['after.jpg'].get('trigger'), 'motion_detection')
+        reloaded._journal.close()
+
+    def test_compact(self):
+        """Test that compacting folds the journal into the metadata file."""
+        self.storage.save_photo(b'data', 'compacted.jpg')
+        self.storage.compact()
+        
+        self.assertEqual(os.path.getsize(self.storage.journal_file), 0)
+        with open(self.storage.metadata_file) as f:
+            saved = json.load(f)
+        self.assertEqual(set(saved), {'compacted.jpg'})
+        
+        # New changes keep going to the emptied journal
+        self.storage.save_photo(b'data', 'after.jpg')
+        reloaded = PhotoStorage(self.base_dir, self.max_photos)
+        self.assertEqual(set(reloaded.metadata), {'compacted.jpg', 'after.jpg'})
+        reloaded._journal.close()
 
     @patch('src.storage.photo_storage.datetime')
     def test_get_date_directory(self, mock_datetime):
@@ -102,13 +165,9 @@ class TestPhotoStorage(unittest.TestCase):
         date_dir = self.storage.get_date_directory()
         self.assertEqual(date_dir, '20220101')
 
-    @patch('src.storage.photo_storage.datetime')
-    def test_generate_filename(self, mock_datetime):
+    @patch('src.storage.photo_storage.time.strftime', return_value='20220101_120000')
+    def test_generate_filename(self, mock_strftime):
         """Test filename generation."""
-        # Mock the datetime to return a fixed timestamp
-        mock_now = MagicMock()
-        mock_now.strftime.return_value = '20220101_120000'
-        mock_datetime.now.return_value = mock_now
         
         filename = self.storage.generate_filename()
         self.assertEqual(filename, '20220101_120000.jpg')
@@ -141,6 +200,15 @@ class TestPhotoStorage(unittest.TestCase):
         result = self.storage.get_photo_path(dir_filename)
         self.assertEqual(result, expected_path)
 
+    def test_get_photo_path_creates_directory_once(self):
+        """Test that the date directory is only created on first use."""
+        with patch('os.makedirs') as mock_makedirs:
+            first = self.storage.get_photo_path('first.jpg')
+            second = self.storage.get_photo_path('second.jpg')
+        
+        mock_makedirs.assert_called_once_with(os.path.dirname(first), exist_ok=True)
+        self.assertEqual(os.path.dirname(first), os.path.dirname(second))
+
     @patch('src.storage.photo_storage.datetime')
     def test_save_photo_bytes(self, mock_datetime):
         """Test saving photo data as bytes."""
@@ -208,6 +276,27 @@ class TestPhotoStorage(unittest.TestCase):
             content = f.read()
             self.assertEqual(content, b'source_data')
 
+    def test_save_photo_file_object(self):
+        """Test saving photo from a file-like object."""
+        result = self.storage.save_photo(io.BytesIO(b'stream_data'), 'streamed.jpg')
+        
+        with open(result, 'rb') as f:
+            self.assertEqual(f.read(), b'stream_data')
+
+    def test_save_photo_already_in_place(self):
+        """Test saving a photo the camera already wrote to its storage path."""
+        filename = 'in_place.jpg'
+        full_path = self.storage.get_photo_path(filename)
+        with open(full_path, 'wb') as f:
+            f.write(b'camera_data')
+        
+        result = self.storage.save_photo(full_path, filename)
+        
+        self.assertEqual(result, full_path)
+        with open(full_path, 'rb') as f:
+            self.assertEqual(f.read(), b'camera_data')
+        self.assertIn(filename, self.storage.metadata)
+
     @patch('src.storage.photo_storage.datetime')
     def test_list_photos(self, mock_datetime):
         """Test listing photos from date-based directories."""
@@ -303,7 +392,7 @@ class TestPhotoStorage(unittest.TestCase):
     def test_enforce_max_photos(self):
         """Test enforcing maximum photos limit."""
         # Create more photos than the maximum
-        num_photos = self.max_photos + 3
+        num_photos = 50
         filenames = [f'test{i}.jpg' for i in range(num_photos)]
         
         # Create the files with increasing timestamps
@@ -311,15 +400,20 @@ class TestPhotoStorage(unittest.TestCase):
             full_path = os.path.join(self.base_dir, filename)
             with open(full_path, 'w') as f:
                 f.write('test')
-            # Set creation time to simulate different creation times
+            # Set modification time to simulate different capture times
             os.utime(full_path, (i, i))
+        
+        # Photos already on disk are picked up when storage starts
+        storage = PhotoStorage(self.base_dir, self.max_photos)
+        self.assertEqual(len(storage.metadata), num_photos)
             
         # Enforce max photos
-        self.storage._enforce_max_photos()
+        storage._enforce_max_photos()
         
         # Verify oldest photos were deleted
-        remaining_photos = self.storage.list_photos()
+        remaining_photos = storage.list_photos()
         self.assertEqual(len(remaining_photos), self.max_photos)
+        self.assertEqual(len(storage.metadata), self.max_photos)
         
         # Verify the newest photos were kept
         for i in range(num_photos - self.max_photos, num_photos):
@@ -328,6 +422,68 @@ class TestPhotoStorage(unittest.TestCase):
         # Verify the oldest photos were deleted
         for i in range(num_photos - self.max_photos):
             self.assertNotIn(f'test{i}.jpg', remaining_photos)
+        storage.close()
+
+    def test_enforce_max_photos_after_save(self):
+        """Test that saving past the limit deletes the oldest saved photos."""
+        num_photos = self.max_photos + 2
+        for i in range(num_photos):
+            self.storage.save_photo(b'data', f'saved{i}.jpg')
+        
+        remaining_photos = [os.path.basename(f) for f in self.storage.list_photos()]
+        self.assertEqual(len(remaining_photos), self.max_photos)
+        self.assertNotIn('saved0.jpg', remaining_photos)
+        self.assertNotIn('saved1.jpg', remaining_photos)
+        self.assertNotIn('saved0.jpg', self.storage.metadata)
+        self.assertIn(f'saved{num_photos - 1}.jpg', remaining_photos)
+
+    def test_enforce_max_photos_with_stale_order(self):
+        """Test that order entries without metadata are dropped, not retried forever."""
+        for i in range(self.max_photos):
+            self.storage.save_photo(b'data', f'saved{i}.jpg')
+        # An entry whose metadata is gone, e.g. after metadata was reassigned
+        self.storage._order.appendleft('ghost.jpg')
+        # And metadata whose order entry is missing
+        self.storage._order.remove('saved2.jpg')
+        
+        self.storage.save_photo(b'data', 'saved2.jpg')
+        self.storage.save_photo(b'data', 'extra.jpg')
+        
+        self.assertNotIn('ghost.jpg', self.storage._order)
+        self.assertEqual(len(self.storage._order), self.max_photos)
+        self.assertEqual(list(self.storage._order)[-2:], ['saved2.jpg', 'extra.jpg'])
+
+    def test_enforce_max_photos_delete_fails(self):
+        """Test that a photo that can't be deleted keeps its metadata."""
+        for i in range(self.max_photos):
+            self.storage.save_photo(b'data', f'saved{i}.jpg')
+        
+        with patch('os.remove', side_effect=PermissionError("denied")):
+            self.storage.save_photo(b'data', 'extra.jpg')
+        
+        # Still on disk, so still tracked and first in line for the next eviction
+        self.assertIn('saved0.jpg', self.storage.metadata)
+        self.assertEqual(self.storage._order[0], 'saved0.jpg')
+        self.assertTrue(os.path.exists(self.storage.metadata['saved0.jpg']['path']))
+        
+        self.storage.save_photo(b'data', 'extra2.jpg')
+        self.assertNotIn('saved0.jpg', self.storage.metadata)
+        self.assertNotIn('saved1.jpg', self.storage.metadata)
+
+    def test_enforce_max_photos_after_reload(self):
+        """Test that the age order of saved photos survives a restart."""
+        for i in range(self.max_photos):
+            self.storage.save_photo(b'data', f'saved{i}.jpg')
+        self.storage.close()
+        
+        reloaded = PhotoStorage(self.base_dir, self.max_photos)
+        reloaded.save_photo(b'data', 'newest.jpg')
+        
+        remaining_photos = [os.path.basename(f) for f in reloaded.list_photos()]
+        self.assertEqual(len(remaining_photos), self.max_photos)
+        self.assertNotIn('saved0.jpg', remaining_photos)
+        self.assertIn('newest.jpg', remaining_photos)
+        reloaded.close()
 
 
 if __name__ == '__main__':
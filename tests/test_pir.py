@@ -6,6 +6,7 @@ This script monitors the PIR sensor and prints when motion is detected.
 import pigpio
 import time
 import os
+import signal
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -48,23 +49,17 @@ def main():
         print("Press CTRL+C to exit")
         
         detection_count = 0
-        last_state = pi.read(PIR_PIN)
         
-        while True:
-            # Read the current state
-            current_state = pi.read(PIR_PIN)
-            
-            # Check if motion was detected (rising edge: 0->1)
-            if current_state == 1 and last_state == 0:
-                detection_count += 1
-                timestamp = time.strftime("%H:%M:%S")
-                print(f"[{timestamp}] Motion detected! (Count: {detection_count})")
-            
-            # Update last state
-            last_state = current_state
-            
-            # Small sleep to prevent CPU hogging
-            time.sleep(0.1)
+        def on_motion(gpio, level, tick):
+            nonlocal detection_count
+            detection_count += 1
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"[{timestamp}] Motion detected! (Count: {detection_count})")
+        
+        # pigpiod reports rising edges (0->1) as they happen, so the main
+        # thread can sleep until Ctrl+C instead of reading the pin
+        callback = pi.callback(PIR_PIN, pigpio.RISING_EDGE, on_motion)
+        signal.pause()
             
     except KeyboardInterrupt:
         print("\nTest ended by user")
@@ -72,6 +67,8 @@ def main():
         print(f"Error: {e}")
     finally:
         # Clean up
+        if 'callback' in locals():
+            callback.cancel()
         if 'pi' in locals() and pi.connected:
             pi.stop()
         print("GPIO cleaned up")
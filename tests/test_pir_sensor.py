@@ -1,13 +1,8 @@
 """Tests for the PIRSensor module."""
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
-import os
 import time
 
-# Add src directory to path to import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from src.sensors.pir_sensor import PIRSensor
 
 
@@ -80,35 +75,50 @@ class TestPIRSensor(unittest.TestCase):
         self.mock_gpio.input.assert_not_called()
         self.assertFalse(result)
 
-    @patch('time.time')
-    @patch('time.sleep')
-    def test_wait_for_motion_success(self, mock_sleep, mock_time):
-        """Test waiting for motion that is detected."""
-        # Setup mock time to increment
-        mock_time.side_effect = [10.0, 10.1, 10.2]
+    def test_setup_registers_edge_callback(self):
+        """Test that setup listens for rising edges instead of polling."""
+        self.mock_gpio.add_event_detect.assert_called_once_with(
+            self.pin,
+            self.mock_gpio.RISING,
+            callback=self.sensor._on_edge
+        )
+
+    def test_wait_for_motion_success(self):
+        """Test waiting for motion that is signalled by an edge."""
+        self.sensor.last_detection_time = 0
+        # Simulate the GPIO interrupt thread reporting a rising edge
+        self.sensor._on_edge(self.pin)
         
-        # Configure detect_motion to return True on second call
-        with patch.object(self.sensor, 'detect_motion', side_effect=[False, True]):
+        with patch.object(self.sensor, 'detect_motion', return_value=False):
+            result = self.sensor.wait_for_motion(timeout=5)
+            
+        self.assertTrue(result)
+        self.assertGreater(self.sensor.last_detection_time, 0)
+        self.assertFalse(self.sensor._motion_event.is_set())
+
+    def test_wait_for_motion_level_high(self):
+        """Test that a pin already held high counts as motion without an edge."""
+        with patch.object(self.sensor, 'detect_motion', return_value=True):
             result = self.sensor.wait_for_motion(timeout=5)
             
         self.assertTrue(result)
-        # Sleep should be called once before detection
-        mock_sleep.assert_called_once_with(0.1)
 
-    @patch('time.time')
-    @patch('time.sleep')
-    def test_wait_for_motion_timeout(self, mock_sleep, mock_time):
+    def test_wait_for_motion_timeout(self):
         """Test waiting for motion with timeout expiring."""
-        # Setup time to increment past the timeout
-        mock_time.side_effect = [10.0, 10.1, 15.1]
+        with patch.object(self.sensor, 'detect_motion', return_value=False):
+            result = self.sensor.wait_for_motion(timeout=0.05)
+            
+        self.assertFalse(result)
+
+    def test_wait_for_motion_ignores_edge_during_cooldown(self):
+        """Test that an edge inside the cooldown window is not reported."""
+        self.sensor.last_detection_time = time.time()
+        self.sensor._on_edge(self.pin)
         
-        # Configure detect_motion to always return False
         with patch.object(self.sensor, 'detect_motion', return_value=False):
-            result = self.sensor.wait_for_motion(timeout=5)
+            result = self.sensor.wait_for_motion(timeout=0.05)
             
         self.assertFalse(result)
-        # Sleep should be called at least once
-        mock_sleep.assert_called_with(0.1)
 
     def test_cleanup(self):
         """Test resource cleanup."""
@@ -1,15 +1,11 @@
 """Tests for the Settings module."""
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
-import sys
 import os
 import json
 import tempfile
 import shutil
 
-# Add src directory to path to import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from src.config.settings import Settings
 
 
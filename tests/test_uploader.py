@@ -1,11 +1,6 @@
 """Tests for the Uploader module."""
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
-import os
-
-# Add src directory to path to import modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.uploader.uploader import Uploader
 
@@ -39,6 +34,88 @@ class TestUploader(unittest.TestCase):
         mock_upload.assert_called_once_with(file_path, remote_path)
         self.assertEqual(result, expected_url)
 
+    def test_upload_batch(self):
+        """Test uploading a batch of photos through an upload session."""
+        self.uploader.endpoint = 'https://uploads.example.com'
+        session = self.uploader.session = MagicMock()
+        session.post.return_value.json.return_value = {
+            'session_id': 'abc123',
+            'urls': {
+                'a.jpg': 'https://bucket.s3.amazonaws.com/a.jpg?sig=1',
+                'b.jpg': 'https://bucket.s3.amazonaws.com/b.jpg?sig=2'
+            }
+        }
+
+        with patch('builtins.open', MagicMock()):
+            result = self.uploader.upload_batch(['/tmp/a.jpg', '/tmp/b.jpg'])
+
+        self.assertEqual(result, [
+            'https://bucket.s3.amazonaws.com/a.jpg',
+            'https://bucket.s3.amazonaws.com/b.jpg'
+        ])
+        self.assertEqual(session.put.call_count, 2)
+        commit_call = session.post.call_args_list[-1]
+        self.assertEqual(commit_call[0][0], 'https://uploads.example.com/commit_session')
+        self.assertEqual(commit_call[1]['json'],
+                         {'session_id': 'abc123', 'files': ['a.jpg', 'b.jpg']})
+
+    @patch('time.sleep')
+    def test_start_session_retries(self, mock_sleep):
+        """Test that a failed session request is retried with backoff."""
+        self.uploader.endpoint = 'https://uploads.example.com'
+        session = self.uploader.session = MagicMock()
+        failed = MagicMock()
+        failed.raise_for_status.side_effect = Exception('503')
+        session.post.side_effect = [failed, session.post.return_value]
+        session.post.return_value.json.return_value = {'session_id': 'abc123', 'urls': {}}
+
+        result = self.uploader._start_session(['a.jpg'])
+
+        self.assertEqual(result['session_id'], 'abc123')
+        self.assertEqual(session.post.call_count, 2)
+        mock_sleep.assert_called_once_with(Uploader.RETRY_BACKOFF)
+
+    def test_upload_batch_missing_url(self):
+        """Test that a file the session returned no URL for counts as failed."""
+        self.uploader.endpoint = 'https://uploads.example.com'
+        session = self.uploader.session = MagicMock()
+        session.post.return_value.json.return_value = {
+            'session_id': 'abc123',
+            'urls': {'a.jpg': 'https://bucket.s3.amazonaws.com/a.jpg?sig=1'}
+        }
+
+        with patch('builtins.open', MagicMock()):
+            result = self.uploader.upload_batch(['/tmp/a.jpg', '/tmp/b.jpg'])
+
+        self.assertEqual(result, ['https://bucket.s3.amazonaws.com/a.jpg'])
+        self.assertEqual(session.put.call_count, 1)
+        commit_call = session.post.call_args_list[-1]
+        self.assertEqual(commit_call[1]['json'], {'session_id': 'abc123', 'files': ['a.jpg']})
+
+    def test_upload_batch_duplicate_remote_paths(self):
+        """Test that duplicate remote paths are rejected before a session starts."""
+        self.uploader.endpoint = 'https://uploads.example.com'
+        session = self.uploader.session = MagicMock()
+
+        with self.assertRaises(ValueError):
+            self.uploader.upload_batch(['/tmp/20240101/a.jpg', '/tmp/20240102/a.jpg'])
+        session.post.assert_not_called()
+
+    def test_upload_batch_without_endpoint(self):
+        """Test that a batch upload requires an endpoint."""
+        with self.assertRaises(ValueError):
+            self.uploader.upload_batch(['/tmp/a.jpg'])
+
+    def test_setup_creates_shared_session(self):
+        """Test that setup creates one reusable HTTP session."""
+        uploader = Uploader(self.service_type, self.credentials, max_workers=4)
+        self.assertIsNotNone(uploader.session)
+        adapter = uploader.session.get_adapter('https://bucket.s3.amazonaws.com')
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+        uploader.cleanup()
+        self.assertIsNone(uploader.session)
+
     @patch('src.uploader.uploader.Uploader.list_uploaded_photos')
     def test_list_uploaded_photos(self, mock_list):
         """Test listing uploaded photos."""